@@ -0,0 +1,891 @@
+import argparse
+import datetime
+import concurrent.futures
+import glob
+import http.server
+import json
+import math
+import os
+import random
+import tempfile
+import time
+import threading
+import tracemalloc
+import zlib
+from unittest import mock
+
+import requests
+
+import numpy as np
+import pandas as pd
+
+import market_scanner as ms
+
+# Benchmark offline pentru market_scanner.py - datele sunt sintetice, fara retea.
+
+INDUSTRIES = [f"Industry {i}" for i in range(150)]
+SECTORS = ['Technology', 'Healthcare', 'Industrials', 'Financial', 'Energy',
+           'Consumer Cyclical', 'Consumer Defensive', 'Utilities', 'Real Estate',
+           'Basic Materials', 'Communication Services']
+
+def synthetic_closes(rng, n=22):
+    start = rng.uniform(5, 500)
+    return (start * np.cumprod(1 + rng.normal(0, 0.02, n))).round(2).tolist()
+
+def synthetic_results(n, seed=42):
+    """Rows shaped like analyze_ticker() output, reproducible for a given seed."""
+    rng = np.random.default_rng(seed)
+    pick = random.Random(seed)
+    rows = []
+    for i in range(n):
+        closes = synthetic_closes(rng)
+        price = closes[-1]
+        atr = round(price * rng.uniform(0.01, 0.06), 2)
+        sector = pick.choice(SECTORS)
+        rows.append({
+            'Ticker': f"T{i:06d}",
+            'Company_Name': f"Synthetic Company {i} Inc.",
+            'Price': price,
+            'Spark': closes,
+            'Target': round(price * rng.uniform(0.8, 1.5), 2),
+            'To Target %': round(rng.uniform(-20, 50), 2),
+            'Consensus': pick.choice(ms.CONSENSUS_LEVELS),
+            'Analysts': int(rng.integers(0, 40)),
+            'Inst Own': round(rng.uniform(0, 100), 2),
+            'Sug. Buy': round(price * 0.95, 2),
+            'Decision': pick.choice(ms.DECISION_LEVELS),
+            'Volume': float(rng.integers(10_000, 50_000_000)),
+            'R:R': round(rng.uniform(-5, 10), 2),
+            'Trend': pick.choice(ms.TREND_LEVELS),
+            'RSI': round(rng.uniform(10, 90), 2),
+            'RSI Status': pick.choice(ms.RSI_STATUS_LEVELS),
+            'ATR': atr,
+            'Stop Loss': round(price - 2 * atr, 2),
+            'SMA 50': round(price * rng.uniform(0.9, 1.1), 2),
+            'SMA 200': round(price * rng.uniform(0.8, 1.2), 2),
+            'Change %': round(rng.uniform(-5, 5), 2),
+            'Momentum_Score': int(rng.integers(0, 101)),
+            'Watchlist_Score': int(rng.integers(0, 101)),
+            'Industry': pick.choice(INDUSTRIES),
+            'Theme': sector,
+        })
+    return rows
+
+def legacy_frame(rows):
+    """The pre-schema representation: object dtypes and one SVG string per row."""
+    legacy = []
+    for r in rows:
+        r = dict(r)
+        closes = r.pop('Spark')
+        color = "#4caf50" if closes[-1] >= closes[0] else "#f44336"
+        r['Grafic'] = ms.generate_sparkline(closes, color=color, width=100, height=30)
+        legacy.append(r)
+    return pd.DataFrame(legacy)
+
+def bench_memory(sizes):
+    # bytes/row pentru frame-ul vechi (object + SVG) vs RESULT_SCHEMA
+    results = []
+    for n in sizes:
+        rows = synthetic_results(n)
+        legacy_bytes = int(legacy_frame(rows).memory_usage(deep=True).sum())
+        typed_bytes = int(ms.to_result_frame(rows).memory_usage(deep=True).sum())
+        results.append({
+            'bench': 'memory', 'rows': n,
+            'legacy_bytes_per_row': round(legacy_bytes / n, 1),
+            'typed_bytes_per_row': round(typed_bytes / n, 1),
+            'reduction_x': round(legacy_bytes / typed_bytes, 2),
+        })
+    return results
+
+# --- FAKE PROVIDERS (finviz / yfinance fara retea) ---
+class FakeFinviz:
+    latency = 0.0
+
+    def __init__(self, ticker):
+        time.sleep(self.latency)
+        self.ticker = ticker
+
+    def ticker_fundament(self):
+        rng = random.Random(self.ticker)
+        price = rng.uniform(5, 500)
+        return {
+            'Price': f"{price:.2f}", 'Target Price': f"{price * rng.uniform(0.8, 1.5):.2f}",
+            'RSI (14)': f"{rng.uniform(10, 90):.2f}", 'ATR': f"{price * 0.03:.2f}",
+            'Recom': f"{rng.uniform(1, 5):.2f}", 'Change': f"{rng.uniform(-5, 5):.2f}%",
+            'SMA50': f"{rng.uniform(-15, 15):.2f}%", 'SMA200': f"{rng.uniform(-30, 30):.2f}%",
+            'Inst Own': f"{rng.uniform(0, 100):.2f}%", 'Volume': f"{rng.randint(10_000, 50_000_000):,}",
+            'Industry': rng.choice(INDUSTRIES),
+        }
+
+class FakeYfTicker:
+    latency = 0.0
+
+    def __init__(self, ticker):
+        self.ticker = ticker
+        self.rng = np.random.default_rng(zlib.crc32(ticker.encode()))
+
+    @property
+    def info(self):
+        time.sleep(self.latency)
+        return {'longName': f"{self.ticker} Inc.", 'numberOfAnalystOpinions': 12,
+                'sector': SECTORS[len(self.ticker) % len(SECTORS)], 'heldPercentInstitutions': 0.5}
+
+    def history(self, period="1mo", **kwargs):
+        time.sleep(self.latency)
+        closes = np.array(synthetic_closes(self.rng))
+        return pd.DataFrame({'Close': closes, 'High': closes * 1.01, 'Low': closes * 0.99})
+
+    @property
+    def calendar(self):
+        time.sleep(self.latency)
+        return {'Earnings Date': [datetime.date.today() + datetime.timedelta(days=len(self.ticker) * 3)],
+                'Earnings Average': 1.0}
+
+# Restul celor ~80 de campuri din snapshot-table2, ca pagina sa aiba dimensiunea reala
+FINVIZ_FILLER = ['Index', 'P/E', 'EPS (ttm)', 'Insider Own', 'Shs Outstand', 'Perf Week', 'Market Cap',
+                 'Forward P/E', 'EPS next Y', 'Insider Trans', 'Shs Float', 'Perf Month', 'Income', 'PEG',
+                 'EPS next Q', 'Short Float', 'Perf Quarter', 'Sales', 'P/S', 'EPS this Y', 'Inst Trans',
+                 'Short Ratio', 'Perf Half Y', 'Book/sh', 'P/B', 'ROA', 'Perf Year', 'Cash/sh', 'P/C',
+                 'EPS next 5Y', 'ROE', 'Perf YTD', 'Dividend', 'P/FCF', 'EPS past 5Y', 'ROI', '52W High',
+                 'Beta', 'Dividend %', 'Quick Ratio', 'Sales past 5Y', 'Gross Margin', '52W Low',
+                 'Employees', 'Current Ratio', 'Sales Q/Q', 'Oper. Margin', 'Debt/Eq', 'EPS Q/Q',
+                 'Profit Margin', 'Rel Volume', 'Prev Close', 'LT Debt/Eq', 'Earnings', 'Payout',
+                 'Avg Volume', 'SMA20', 'Optionable', 'Shortable']
+
+def synthetic_quote_page(ticker):
+    """HTML shaped like a finviz quote page (header, quote-links, 12-column snapshot-table2)."""
+    fund = FakeFinviz(ticker).ticker_fundament()
+    rng = random.Random(ticker + 'filler')
+    fields = [(k, rng.choice(['12.34', '5.67%', '-', '1.23B', 'Yes'])) for k in FINVIZ_FILLER]
+    fields += [(k, v) for k, v in fund.items() if k != 'Industry']
+    fields.insert(10, ('52W Range', '120.00 - 200.00'))
+    fields.insert(20, ('Volatility', '2.10% 1.95%'))
+    rng.shuffle(fields)
+    rows = "".join(
+        '<tr class="table-dark-row">' + "".join(
+            f'<td class="snapshot-td2 cursor-pointer w-[7%]" align="left"><div class="flex">{k}</div></td>'
+            f'<td class="snapshot-td2 w-[8%]" align="left"><b><span>{v}</span></b></td>'
+            for k, v in fields[i:i + 6]) + '</tr>'
+        for i in range(0, len(fields), 6))
+    links = (f'<a href="screener.ashx?v=111&f=sec_x" class="tab-link">Technology</a>'
+             f'<a href="screener.ashx?v=111&f=ind_x" class="tab-link">{fund["Industry"]}</a>'
+             f'<a href="screener.ashx?v=111&f=geo_usa" class="tab-link">USA</a>'
+             f'<a href="screener.ashx?v=111&f=exch_nasd" class="tab-link">NASD</a>')
+    nav = "".join(f'<li><a href="/x{i}">Menu {i}</a></li>' for i in range(300))
+    return (f'<html><head><title>{ticker} Stock Price</title><script>var x = 1;</script></head><body>'
+            f'<ul class="nav">{nav}</ul>'
+            f'<h2 class="quote-header_ticker-wrapper_company"><a href="#">{ticker} Inc.</a></h2>'
+            f'<div class="quote-links"><div class="flex">{links}</div></div>'
+            f'<div class="screener_snapshot-table-wrapper"><table class="js-snapshot-table snapshot-table2 screener_snapshot-table-body">'
+            f'<tbody>{rows}</tbody></table></div></body></html>')
+
+def fake_finviz_page(ticker):
+    time.sleep(FakeFinviz.latency)
+    return synthetic_quote_page(ticker)
+
+def fake_providers(latency_ms=0.0):
+    FakeFinviz.latency = FakeYfTicker.latency = latency_ms / 1000.0
+    return [mock.patch.object(ms, 'fetch_finviz_page', fake_finviz_page),
+            mock.patch.object(ms, 'finvizfinance', FakeFinviz),
+            mock.patch.object(ms.yf, 'Ticker', FakeYfTicker),
+            mock.patch.dict(ms.YF_HANDLES, clear=True)]
+
+def synthetic_cortex(rng=None, sparklines=True):
+    rng = rng or random.Random(0)
+    cortex = {}
+    for name in ['VIX', 'VIX3M', 'VIX1D', 'VIX9D', 'VXN', 'LTV', 'SKEW', 'MOVE', 'GVZ', 'OVX', 'SPX', 'CRYPTO FEAR']:
+        closes = [rng.uniform(10, 40) for _ in range(22)]
+        cortex[name] = {'value': round(closes[-1], 2), 'change': round(closes[-1] - closes[-2], 2),
+                        'sparkline': ms.generate_sparkline(closes) if sparklines else '', 'status': 'NORMAL',
+                        'status_color': '#888', 'text_color': 'text-success'}
+    cortex['SMA200%'] = {'value': f"{rng.uniform(20, 80):.1f}%", 'change': 0, 'sparkline': '',
+                         'status': 'BULLISH', 'status_color': '#4caf50', 'text_color': 'text-success'}
+    cortex['Highs-Lows'] = {'value': rng.randint(-100, 100), 'change': 0, 'sparkline': '',
+                            'status': 'NET HIGHS', 'status_color': '#4caf50', 'text_color': 'text-success'}
+    cortex['breadth_valid'] = True
+    return cortex
+
+# --- MEASUREMENT ---
+def percentile(sorted_vals, q):
+    if not sorted_vals: return 0.0
+    k = min(len(sorted_vals) - 1, max(0, int(round(q / 100 * (len(sorted_vals) - 1)))))
+    return sorted_vals[k]
+
+def measure(name, n, setup, run, repeat=1):
+    """Time `run(state)` (it returns per-item latencies or None), then rerun under tracemalloc for peak memory."""
+    state = setup()
+    latencies = []
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        t_run = time.perf_counter()
+        item_lat = run(state)
+        latencies.extend(item_lat if item_lat is not None else [time.perf_counter() - t_run])
+    elapsed = time.perf_counter() - t0
+
+    state = setup()
+    tracemalloc.start()
+    run(state)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies.sort()
+    return {
+        'bench': name, 'rows': n,
+        'seconds': round(elapsed / repeat, 6),
+        'throughput_per_s': round(n * repeat / elapsed, 1) if elapsed > 0 else 0.0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 4),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 4),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 4),
+        'peak_mem_mb': round(peak / 1e6, 2),
+    }
+
+def discard(_):
+    return None
+
+def timed_each(fn, items):
+    lat = []
+    for item in items:
+        t = time.perf_counter()
+        fn(item)
+        lat.append(time.perf_counter() - t)
+    return lat
+
+# --- BENCHMARKS ---
+def bench_sparkline(n, opts):
+    rng = np.random.default_rng(1)
+    return measure('sparkline', n, lambda: [synthetic_closes(rng) for _ in range(n)],
+                   lambda series: timed_each(ms.generate_sparkline, series))
+
+def bench_analyze(n, opts):
+    tickers = [f"T{i:06d}" for i in range(n)]
+    patches = fake_providers(0)
+    for p in patches: p.start()
+    try:
+        return measure('analyze_ticker', n, lambda: tickers, lambda ts: timed_each(ms.analyze_ticker, ts))
+    finally:
+        for p in patches: p.stop()
+
+def bench_process(n, opts):
+    tickers = [f"T{i:06d}" for i in range(n)]
+    patches = fake_providers(opts.latency_ms)
+    for p in patches: p.start()
+    fetch = ms.fetch_ticker
+    def run(ts):
+        # latenta per simbol, masurata in interiorul process_ticker_list
+        lat = []
+        def timed(t):
+            start = time.perf_counter()
+            try: return fetch(t)
+            finally: lat.append(time.perf_counter() - start)
+        with mock.patch.object(ms, 'fetch_ticker', timed), mock.patch('builtins.print'):
+            ms.process_ticker_list(ts)
+        return lat
+    try:
+        return measure('process_ticker_list', n, lambda: tickers, run)
+    finally:
+        for p in patches: p.stop()
+
+def bench_verdict(n, opts):
+    rng = random.Random(2)
+    return measure('calculate_verdict', n, lambda: [synthetic_cortex(rng, sparklines=False) for _ in range(n)],
+                   lambda cortexes: timed_each(ms.calculate_verdict, cortexes))
+
+def bench_verdict_panel(n, opts):
+    # n = numar de zile din panel, scorate intr-un singur apel vectorizat
+    def setup():
+        rng = np.random.default_rng(3)
+        return pd.DataFrame({
+            'vix': rng.uniform(10, 40, n), 'vix3m': rng.uniform(10, 40, n), 'vix_change': rng.normal(0, 1, n),
+            'sma200_pct': rng.uniform(20, 80, n), 'highs_lows': rng.integers(-100, 100, n),
+            'crypto_fear': rng.integers(0, 100, n), 'move': rng.uniform(60, 150, n),
+        })
+    return measure('verdict_scores', n, setup, lambda panel: discard(ms.verdict_scores(panel)), repeat=opts.repeat)
+
+def bench_build_rows(n, opts):
+    with cold_render_cache():
+        return measure('build_rows', n, lambda: ms.to_result_frame(synthetic_results(n)),
+                       lambda df: discard(ms.build_rows(df)), repeat=opts.repeat)
+
+def cold_render_cache():
+    """Patch: every render pass starts with an empty fragment cache."""
+    return mock.patch.object(ms, 'render_cache', lambda: ms.RenderCache(path=os.devnull, persist=False))
+
+def bench_html(n, opts, warm=False):
+    # warm=True: fragmentele sunt deja in cache (rulare urmatoare, randuri neschimbate)
+    out_dir = tempfile.mkdtemp(prefix='bench_html_')
+    def setup():
+        df = ms.to_result_frame(synthetic_results(n))
+        state = df, df.head(40)
+        if warm: run(state)
+        return state
+    def run(state):
+        df_main, df_custom = state
+        ms.RENDER_CACHE = None
+        with mock.patch('builtins.print'):
+            ms.generate_html(df_main, df_custom, cortex, verdict)
+    cortex = synthetic_cortex()
+    verdict = ms.calculate_verdict(cortex)
+    patches = fake_providers(0) + [mock.patch.object(ms, 'OUTPUT_HTML', os.path.join(out_dir, 'index.html')),
+                                   mock.patch.object(ms, 'RENDER_CACHE_FILE', os.path.join(out_dir, 'render_cache.jsonl'))]
+    if not warm: patches.append(cold_render_cache())
+    for p in patches: p.start()
+    try:
+        return measure('generate_html_warm' if warm else 'generate_html', n, setup, run, repeat=opts.repeat)
+    finally:
+        for p in patches: p.stop()
+        ms.RENDER_CACHE = None
+
+def synthetic_panel(tickers, bars=260, seed=4):
+    """In-memory stand-in for open_ohlc_panel() (Close only)."""
+    rng = np.random.default_rng(seed)
+    close = (100 * np.cumprod(1 + rng.normal(0, 0.02, (len(tickers), bars)), axis=1)).astype(np.float32)
+    dates = np.arange(np.datetime64('2025-01-01'), np.datetime64('2025-01-01') + bars)
+    return {'tickers': tickers, 'ticker_index': {t: i for i, t in enumerate(tickers)},
+            'dates': dates, 'fields': {'Close': close}}
+
+def bench_rotation(n, opts):
+    # n = simboluri; ~150 industrii, 11 teme, panel de 260 zile
+    def setup():
+        df = ms.to_result_frame(synthetic_results(n))
+        return df, synthetic_panel(df['Ticker'].tolist())
+    def run(state):
+        df, panel = state
+        discard([ms.rotation_analytics(df, by, panel, 0.01) for by in ['Industry', 'Theme']])
+    return measure('rotation_analytics', n, setup, run, repeat=opts.repeat)
+
+def bench_target_odds(n, opts):
+    # n = simboluri; tabela Monte Carlo (MC_PATHS traiectorii) construita la fiecare rulare + lookup vectorizat
+    def setup():
+        df = ms.to_result_frame(synthetic_results(n))
+        return df, synthetic_panel(df['Ticker'].tolist())
+    def run(state):
+        df, panel = state
+        ms.MC_TABLE = None
+        discard(ms.add_target_odds(df, panel))
+    try:
+        return measure('target_odds', n, setup, run, repeat=opts.repeat)
+    finally:
+        ms.MC_TABLE = None
+
+class ThrottlingServer:
+    """Local HTTP server that answers 429 above `capacity` concurrent requests.
+
+    The capacity drops to `capacity // 2` after `drop_after` requests, like a provider
+    tightening its limits mid-run, so the limiter has to both grow and back off.
+    """
+    def __init__(self, capacity=8, latency_ms=20, drop_after=None):
+        self.capacity, self.latency = capacity, latency_ms / 1000
+        self.drop_after = drop_after
+        self.lock = threading.Lock()
+        self.inflight = self.served = self.rejected = 0
+        server = self
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                with server.lock:
+                    server.inflight += 1
+                    cap = server.capacity
+                    if server.drop_after is not None and server.served >= server.drop_after:
+                        cap = max(1, cap // 2)
+                    over = server.inflight > cap
+                    if over: server.rejected += 1
+                try:
+                    time.sleep(server.latency if not over else server.latency / 4)
+                    self.send_response(429 if over else 200)
+                    self.send_header('Content-Length', '2')
+                    self.end_headers()
+                    self.wfile.write(b'ok')
+                finally:
+                    with server.lock:
+                        server.inflight -= 1
+                        if not over: server.served += 1
+            def log_message(self, *args):
+                pass
+        self.httpd = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}/quote"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+def bench_throttle(n, opts):
+    # n cereri prin limited_call() catre un server local care limiteaza (429) peste capacitate
+    # latenta fixa de 20 ms: --latency-ms e gandit pentru providerii falsi din 'process'
+    latency = 20
+    session = requests.Session()
+    session.mount('http://', requests.adapters.HTTPAdapter(pool_maxsize=ms.FETCH_WORKERS))
+    def fetch(url):
+        r = session.get(url, timeout=5)
+        r.raise_for_status()
+        return r
+    def setup():
+        ms.HOST_LIMITERS.pop('throttle-bench', None)
+        return ThrottlingServer(capacity=8, latency_ms=latency, drop_after=n // 2)
+    def run(server):
+        lat = []
+        def one(_):
+            start = time.perf_counter()
+            try: ms.limited_call('throttle-bench', fetch, server.url)
+            except requests.HTTPError: pass
+            finally: lat.append(time.perf_counter() - start)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=ms.FETCH_WORKERS) as pool:
+            list(pool.map(one, range(n)))
+        if not stats:  # prima rulare; cea de sub tracemalloc are alte latente
+            stats.update(ms.host_limiter('throttle-bench').snapshot(), server_429=server.rejected)
+        server.close()
+        return lat
+    stats = {}
+    with mock.patch.object(ms, 'THROTTLE_SLEEP', 0.05), \
+         mock.patch.dict(ms.HOST_LIMITS, {'throttle-bench': {'initial': 2, 'min': 1, 'max': 16}}):
+        result = measure('throttle_aimd', n, setup, run)
+    result.update({f"host_{k}": v for k, v in stats.items()})
+    return result
+
+FIXTURES_DIR = 'bench_fixtures'   # pagini finviz salvate (<TICKER>.html); fara ele finviz_parse e sarit
+
+def quote_fixtures(n, fixtures_dir):
+    """n pages cycled from the saved fixtures, plus how many distinct files there were ([] if none)."""
+    pages = sorted(glob.glob(os.path.join(fixtures_dir, '*.html')))
+    html = [open(p, encoding='utf-8', errors='replace').read() for p in pages]
+    return [html[k % len(html)] for k in range(n)] if html else [], len(html)
+
+def library_fundament(html):
+    """finvizfinance's own parse of a page (BeautifulSoup tree + ticker_fundament), without the network."""
+    from bs4 import BeautifulSoup
+    import finvizfinance.quote as fq
+    with mock.patch.object(fq, 'web_scrap', lambda url: BeautifulSoup(html, 'lxml')):
+        return fq.finvizfinance('FIXTURE').ticker_fundament()
+
+def cpu_each(fn, items):
+    out = []
+    for item in items:
+        t = time.process_time()
+        fn(item)
+        out.append(time.process_time() - t)
+    return out
+
+def bench_finviz_parse(n, opts):
+    # n pagini; CPU per pagina: extractorul lxml vs. finvizfinance (BeautifulSoup)
+    pages, files = quote_fixtures(n, opts.fixtures)
+    if not pages:
+        print(f"skip finviz_parse@{n} (nicio pagina *.html in {opts.fixtures})")
+        return None
+    result = measure('finviz_parse_lean', n, lambda: pages, lambda ps: cpu_each(ms.extract_finviz_fields, ps))
+    library = sorted(cpu_each(library_fundament, pages))
+    wanted = ms.FINVIZ_FIELDS + ['Industry']
+    mismatches = 0
+    for html in pages[:50]:
+        lean, full = ms.extract_finviz_fields(html), library_fundament(html)
+        mismatches += sum(lean.get(k) != full.get(k) for k in wanted if k in full)
+    result.update({
+        'fixtures': files,
+        'library_p50_ms': round(percentile(library, 50) * 1000, 4),
+        'speedup_p50': round(percentile(library, 50) / max(result['p50_ms'] / 1000, 1e-9), 1),
+        'field_mismatches': mismatches,
+    })
+    return result
+
+def synthetic_chains(tickers, out_dir, expiries=8, contracts=120, seed=5):
+    """Write chain fixtures in the OPTIONS_DIR layout (<SIMBOL>/expiries.json + <expirare>.npy)."""
+    rng = np.random.default_rng(seed)
+    first = datetime.date.today() + datetime.timedelta(days=1)
+    dates = [(first + datetime.timedelta(days=7 * k)).isoformat() for k in range(expiries)]
+    for t in tickers:
+        d = os.path.join(out_dir, t.replace('^', '_'))
+        os.makedirs(d, exist_ok=True)
+        with open(os.path.join(d, 'expiries.json'), 'w') as f: json.dump(dates, f)
+        for e in dates:
+            arr = np.column_stack([np.arange(contracts) % 2, rng.uniform(50, 500, contracts),
+                                   rng.integers(0, 5000, contracts), rng.integers(0, 800, contracts)])
+            np.save(os.path.join(d, f"{e}.npy"), arr.astype(np.float32))
+
+def reference_putcall(chains):
+    """pandas groupby over the concatenated chains, to check putcall_table."""
+    frames = [pd.DataFrame(a, columns=ms.CHAIN_FIELDS).assign(symbol=s) for s, arrs in chains.items() for a in arrs]
+    g = pd.concat(frames).groupby(['symbol', 'put'])[['openInterest', 'volume']].sum().unstack('put')
+    return g[('volume', 1.0)] / g[('volume', 0.0)]
+
+def bench_putcall(n, opts):
+    # n suport-uri x 8 expirari, citite din cache (fara retea); --fixtures/options = lanturi inregistrate
+    recorded = os.path.join(opts.fixtures, 'options')
+    if os.path.isdir(recorded):
+        options_dir, source = recorded, 'recorded'
+        tickers = sorted(os.listdir(recorded))[:n]
+    else:
+        options_dir, source = tempfile.mkdtemp(prefix='bench_options_'), 'synthetic'
+        tickers = [f"T{i:06d}" for i in range(n)]
+        synthetic_chains(ms.PUTCALL_INDEX + tickers, options_dir)
+    state_dir = tempfile.mkdtemp(prefix='bench_pc_state_')
+    patches = [mock.patch.object(ms, 'OPTIONS_DIR', options_dir),
+               mock.patch.object(ms, 'PUTCALL_STATE_FILE', os.path.join(state_dir, 'index_putcall.json')),
+               mock.patch('builtins.print')]
+    for p in patches: p.start()
+    try:
+        result = measure('putcall', n, lambda: tickers, lambda ts: discard(ms.get_putcall_data(ts, fetch=False)),
+                         repeat=opts.repeat)
+        chains = ms.collect_option_chains(tickers, fetch=False)
+        t0 = time.perf_counter()
+        table = ms.putcall_table(chains)
+        aggregate_ms = (time.perf_counter() - t0) * 1000
+        ref = reference_putcall({t: chains[t] for t in tickers[:50]})
+    finally:
+        for p in patches: p.stop()
+    result.update({
+        'fixtures': source,
+        'aggregate_only_ms': round(aggregate_ms, 2),
+        'max_abs_diff_vs_groupby': float((table['pc_volume'].reindex(ref.index) - ref).abs().max()) if len(ref) else 0.0,
+    })
+    return result
+
+BENCHMARKS = {
+    'sparkline': bench_sparkline,
+    'analyze': bench_analyze,
+    'process': bench_process,
+    'verdict': bench_verdict,
+    'verdict_panel': bench_verdict_panel,
+    'build_rows': bench_build_rows,
+    'html': bench_html,
+    'html_warm': lambda n, opts: bench_html(n, opts, warm=True),
+    'rotation': bench_rotation,
+    'target_odds': bench_target_odds,
+    'putcall': bench_putcall,
+    'throttle': bench_throttle,
+    'finviz_parse': bench_finviz_parse,
+}
+
+# Benchmark-urile cu latenta simulata nu ruleaza implicit la 100k (ar dura minute)
+DEFAULT_MAX_ROWS = {'process': 1000, 'throttle': 2000, 'finviz_parse': 2000}
+
+# --- CHECKS (corectitudine, offline; `--check`) ---
+def isolated_state(tmp):
+    """Patches that keep a check's files (shards, cache, reports) inside `tmp`."""
+    return [mock.patch.object(ms, 'SHARD_DIR', os.path.join(tmp, 'shards')),
+            mock.patch.object(ms, 'PANEL_DIR', os.path.join(tmp, 'ohlc_panel')),
+            mock.patch.object(ms, 'QUARANTINE_FILE', os.path.join(tmp, 'quarantine.json')),
+            mock.patch.object(ms, 'YAHOO_AUTH_FILE', os.path.join(tmp, 'yahoo_auth.json')),
+            mock.patch.object(ms, 'RUN_REPORT', {}),
+            mock.patch('builtins.print')]
+
+def check_shard_merge():
+    """run_shard x2 -> merge_shards gives every ticker of both lists, in file order."""
+    tmp = tempfile.mkdtemp(prefix='check_shard_')
+    main_list, custom_list = [f"T{i:06d}" for i in range(12)], ['T000003', 'C000001', 'C000002']
+    for name, tickers in [('main.txt', main_list), ('custom.txt', custom_list)]:
+        with open(os.path.join(tmp, name), 'w') as f: f.write("\n".join(tickers))
+    patches = fake_providers(0) + isolated_state(tmp) + [
+        mock.patch.object(ms, 'TICKERS_FILE', os.path.join(tmp, 'main.txt')),
+        mock.patch.object(ms, 'CUSTOM_TICKERS_FILE', os.path.join(tmp, 'custom.txt'))]
+    for p in patches: p.start()
+    try:
+        for i in range(2):
+            ms.run_shard(i, 2, refresh_panel=False, full=True)
+        df_main, df_custom = ms.merge_shards(2)
+    finally:
+        for p in patches: p.stop()
+    assert df_main['Ticker'].tolist() == main_list, df_main['Ticker'].tolist()
+    assert df_custom['Ticker'].tolist() == custom_list, df_custom['Ticker'].tolist()
+
+def check_render_cache():
+    """A rerun where only the columns outside the fragment changed is all hits and renders the same rows."""
+    tmp = tempfile.mkdtemp(prefix='check_render_')
+    df = ms.to_result_frame(synthetic_results(300))
+    def rows(frame):
+        with mock.patch.object(ms, 'RENDER_CACHE_FILE', os.path.join(tmp, 'render_cache.jsonl')), \
+             mock.patch.object(ms, 'RUN_REPORT', {}) as report:
+            html = ms.build_rows(frame)
+            ms.finish_render_cache()
+            return html, report['render_cache']
+    cold, _ = rows(df)
+    changed = df.assign(**{'Target Prob %': 12.5, 'Hold Days': 40.0, 'P/C': 0.8})
+    warm, report = rows(changed)
+    assert report['hit_ratio'] == 1.0, report
+    with cold_render_cache():
+        assert warm == ms.build_rows(changed), "fragmentele din cache difera de randarea la rece"
+    assert cold != warm
+
+def check_artifacts():
+    """commit_artifact streams (flat memory), ignores the Updated stamp; a refetch with equal values keeps Changed."""
+    tmp = tempfile.mkdtemp(prefix='check_artifact_')
+    path, new = os.path.join(tmp, 'page.html'), os.path.join(tmp, 'page.html.tmp')
+    row = '<tr><td>T000001</td><td>$12.34</td><td class="small row-age" data-ts="1760000000">10-09 10:00</td></tr>\n'
+    def page(stamp, body):
+        return f'<small>Updated: <span class="generated-at">{stamp}</span> (RO)</small>\n' + body
+    with open(path, 'w') as f: f.write(page('2026-10-19 10:00', row * 200_000))
+    with mock.patch.object(ms, 'RUN_REPORT', {}) as report:
+        with open(new, 'w') as f: f.write(page('2026-10-19 11:00', row * 200_000))
+        tracemalloc.start()
+        ms.commit_artifact(new, path)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        assert not report['artifacts'][path]['written'] and not os.path.exists(new), report
+        assert peak < 1e6, f"commit_artifact: {peak / 1e6:.1f} MB pentru un fisier de {os.path.getsize(path) / 1e6:.0f} MB"
+        with open(new, 'w') as f: f.write(page('2026-10-19 12:00', row * 199_999 + row.replace('12.34', '12.35')))
+        ms.commit_artifact(new, path)
+        assert report['artifacts'][path]['written'] and report['artifacts'][path]['bytes_changed'] == len(row), report
+
+    snap = os.path.join(tmp, 'scan_snapshot.csv')
+    fresh = ms.to_result_frame(synthetic_results(50)).assign(Fetched='2026-10-19T10:00:00')
+    ms.save_scan_snapshot(ms.stamp_changed(fresh, None), snap)
+    again = fresh.assign(Fetched='2026-10-19T16:00:00')
+    again.loc[7, 'Price'] += 1
+    stamped = ms.stamp_changed(again, ms.load_scan_snapshot(snap))
+    assert (stamped['Changed'] == '2026-10-19T10:00:00').sum() == 49 and stamped.loc[7, 'Changed'] == '2026-10-19T16:00:00', \
+        stamped['Changed'].value_counts()
+
+def check_verdict_history():
+    """Rows without breadth are partial (no signal, no flip); recorded breadth makes them score like the live row."""
+    tmp = tempfile.mkdtemp(prefix='check_verdict_')
+    days = pd.bdate_range(end=pd.Timestamp.today().normalize() - pd.Timedelta(days=1), periods=10)
+    store = pd.DataFrame({'^VIX': np.linspace(20, 15, 10), '^VIX3M': 25.0, '^MOVE': 90.0}, index=days)
+    fng = pd.Series(60.0, index=days)
+    cortex = synthetic_cortex()
+    cortex.update({'VIX': {'value': 14.0, 'change': -1.0}, 'VIX3M': {'value': 25.0}, 'MOVE': {'value': 90.0},
+                   'CRYPTO FEAR': {'value': 60}, 'SMA200%': {'value': '65%'}, 'Highs-Lows': {'value': 40}})
+    path = os.path.join(tmp, 'breadth.csv')
+    for day in days[-3:]:
+        ms.record_breadth(cortex, path, day=day.date())
+    ms.record_breadth(dict(cortex, breadth_valid=False), path, day=days[-4].date())
+    history = ms.calculate_verdict_history(cortex, store, fng, ms.load_breadth_history(path))
+    assert history['partial'].tolist() == [True] * 7 + [False] * 4, history['partial'].tolist()
+    assert history['signal'].iloc[:7].isna().all() and (history['signal'].iloc[7:] == 'BUY').all(), history['signal'].tolist()
+    assert history['score'].iloc[-1] == ms.calculate_verdict(cortex)['bull_prob'], history['score'].tolist()
+    assert 'Niciun semnal schimbat' in ms.render_verdict_timeline(history)
+
+def check_quality_refetch():
+    """A stale row is refetched with a new yf.Ticker and refreshed panel rows, so the flag clears."""
+    tmp = tempfile.mkdtemp(prefix='check_quality_')
+    days = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=60)
+    calls = []
+    def download(symbols, period=None, start=None):
+        calls.append(tuple(symbols))
+        idx = days if start is None else days[days >= pd.Timestamp(start)]
+        cols = pd.MultiIndex.from_product([ms.PANEL_FIELDS, symbols])
+        frame = pd.DataFrame(np.random.default_rng(3).random((len(idx), len(cols))) + 10, index=idx, columns=cols)
+        if start is None: frame.loc[frame.index[-10]:, (slice(None), 'AAA')] = np.nan   # AAA ramane in urma
+        return frame
+    rows = ms.to_result_frame(synthetic_results(2)).assign(Ticker=['AAA', 'BBB'], **{'R:R': 2.0})
+    handles = {'AAA': object(), 'BBB': object()}
+    patches = isolated_state(tmp) + [mock.patch.object(ms, 'download_ohlc', side_effect=lambda s, **k: download(s, **k)),
+                                     mock.patch.object(ms, 'YF_HANDLES', dict(handles))]
+    for p in patches: p.start()
+    try:
+        ms.prepare_ohlc_panel(['AAA', 'BBB'])
+        calls.clear()
+        out = ms.quality_gate(rows, refetch=lambda ts: rows[rows['Ticker'].isin(ts)].reset_index(drop=True))
+        assert calls == [('AAA',)], calls
+        assert 'AAA' not in ms.YF_HANDLES and ms.YF_HANDLES['BBB'] is handles['BBB'], ms.YF_HANDLES
+        assert (out['Data_Status'] == '').all() and ms.RUN_REPORT['quality']['recovered'] == 1, out[['Ticker', 'Data_Status']]
+    finally:
+        for p in patches: p.stop()
+        ms.OHLC_PANEL, ms.PANEL_OWNER = None, False
+
+def save_quarantine_worker(args):
+    path, shard, symbols = args
+    with mock.patch.object(ms, 'QUARANTINE', {}), mock.patch.object(ms, 'QUARANTINE_TOUCHED', set()):
+        for s in symbols:
+            ms.QUARANTINE.setdefault('finviz', {})[s] = {'failures': 2, 'next_probe': '2099-01-01T00:00:00', 'error': shard}
+            ms.QUARANTINE_TOUCHED.add(('finviz', s))
+            ms.save_quarantine(path)
+
+def check_quarantine_shards():
+    """Shard processes saving the quarantine at the same time do not drop each other's entries."""
+    path = os.path.join(tempfile.mkdtemp(prefix='check_quarantine_'), 'quarantine.json')
+    jobs = [(path, f"shard{i}", [f"S{i}_{k:03d}" for k in range(40)]) for i in range(4)]
+    with concurrent.futures.ProcessPoolExecutor(len(jobs)) as pool:
+        list(pool.map(save_quarantine_worker, jobs))
+    saved = ms.load_json(path, {}).get('finviz', {})
+    assert len(saved) == sum(len(j[2]) for j in jobs), f"{len(saved)} intrari salvate din {sum(len(j[2]) for j in jobs)}"
+
+def check_carried_rows():
+    """Reused rows keep their spark when the panel has none and are marked with their fetch age on the page."""
+    tmp = tempfile.mkdtemp(prefix='check_carried_')
+    snap = os.path.join(tmp, 'scan_snapshot.csv')
+    rows = ms.to_result_frame(synthetic_results(3)).assign(Fetched='2026-10-19T10:00:00', Changed='2026-10-18T10:00:00')
+    ms.save_scan_snapshot(rows, snap)
+    with mock.patch.object(ms, 'OHLC_PANEL', None):
+        carried = ms.carry_rows(ms.load_scan_snapshot(snap), ['T000001'])
+    assert carried['Carried'].all() and np.allclose(carried['Spark'][0], rows['Spark'][1], rtol=1e-5), carried['Spark'][0]
+    with cold_render_cache():
+        html = ms.build_rows(carried)
+    epoch, _ = ms.row_age('2026-10-19T10:00:00')
+    assert 'row-carried' in html and f'data-ts="{epoch}"' in html and '↻' in html, html[-400:]
+
+def check_finviz_parser():
+    """Suffixes, decorations, placeholders and bad values; the column parser agrees with the scalar one."""
+    nan = float('nan')
+    cases = {'1.2K': 1200.0, '3.5M': 3.5e6, '2B': 2e9, '0.5t': 5e11, '$1,234.5': 1234.5, '12.3%': 12.3,
+             '-4.10%': -4.1, ' 42 ': 42.0}
+    for raw, want in cases.items():
+        value, missing, failed = ms.parse_finviz_value(raw)
+        assert (abs(value - want) < 1e-6 * max(1, abs(want)), missing, failed) == (True, False, False), (raw, value)
+    for raw in ['-', '', None, nan]:
+        value, missing, failed = ms.parse_finviz_value(raw)
+        assert math.isnan(value) and missing and not failed, raw
+    for raw in ['N/A', 'abc', '1.2X', 'nan', 'inf']:
+        value, missing, failed = ms.parse_finviz_value(raw)
+        assert math.isnan(value) and failed and not missing, raw
+    values, failures = ms.parse_finviz_fields({'Price': '$10.5', 'ATR': '-', 'Volume': '1.5M', 'RSI (14)': 'bad'},
+                                              ms.FUND_NUMERIC_DEFAULTS)
+    assert failures == ['RSI (14)'], failures
+    assert (values['Price'], values['ATR'], values['Volume'], values['RSI (14)'], values['Recom']) == (10.5, 0.0, 1.5e6, 0.0, 3.0), values
+    column = list(cases) + ['-', '', None, nan, 'N/A', 'abc', '1.2X', 'nan', 'inf']
+    parsed = ms.parse_finviz_column(column)
+    for k, raw in enumerate(column):
+        value, missing, failed = ms.parse_finviz_value(raw)
+        assert (parsed.missing[k], parsed.failed[k]) == (missing, failed), (raw, parsed)
+        assert (math.isnan(value) and math.isnan(parsed.values[k])) or abs(value - parsed.values[k]) < 1e-9 * max(1, abs(value)), raw
+    funds = [{'Price': '$10.5', 'ATR': '-', 'Volume': '1.5M', 'RSI (14)': 'bad'}, {}, {'Recom': '1.8', 'Change': '-2.5%'}]
+    batch, bad = ms.parse_fund_batch([{'Ticker': f"T{k}", 'fund': f} for k, f in enumerate(funds)])
+    assert bad == {'T0': ['RSI (14)']}, bad
+    assert batch == [ms.parse_finviz_fields(f, ms.FUND_NUMERIC_DEFAULTS)[0] for f in funds], batch
+
+def check_panel_refresh():
+    """Incremental refresh: one stale ticker does not drag the others' start date back."""
+    tmp = tempfile.mkdtemp(prefix='check_panel_')
+    days = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=260)
+    calls = []
+    def download(symbols, period=None, start=None):
+        calls.append((tuple(symbols), start))
+        idx = days if start is None else days[days >= pd.Timestamp(start)]
+        if start is None: idx = idx[:-3]                      # prima descarcare ramane in urma 3 zile
+        cols = pd.MultiIndex.from_product([ms.PANEL_FIELDS, symbols])
+        frame = pd.DataFrame(np.random.default_rng(1).random((len(idx), len(cols))) + 10, index=idx, columns=cols)
+        if start is None and 'DEAD' in symbols:
+            frame.loc[frame.index[-200]:, (slice(None), 'DEAD')] = np.nan   # delistat de ~200 zile
+        return frame
+    with mock.patch.object(ms, 'download_ohlc', side_effect=lambda s, **k: download(s, **k)), \
+         mock.patch('builtins.print'):
+        ms.refresh_ohlc_panel(['AAA', 'BBB', 'DEAD'], tmp)
+        calls.clear()
+        panel = ms.refresh_ohlc_panel(['AAA', 'BBB', 'DEAD'], tmp)
+    starts = {sym: start for syms, start in calls for sym in syms}
+    assert starts['AAA'] == starts['BBB'] == str(days[-4].date()), calls
+    cap = np.datetime64(datetime.date.today(), 'D') - ms.PANEL_STALE_DAYS
+    assert np.datetime64(starts['DEAD']) == cap, calls
+    assert panel['dates'][-1] == np.datetime64(days[-1].date(), 'D')
+
+def check_top_n():
+    """NaN scores rank last; ties keep file order."""
+    df = pd.DataFrame({'Ticker': list('ABCDEF'), 'R:R': [1.0, np.nan, 3.0, np.nan, 3.0, 2.0]})
+    assert ms.top_n(df, 'R:R', 3)['Ticker'].tolist() == ['C', 'E', 'F']
+    assert ms.top_n(df, 'R:R', 6)['Ticker'].tolist() == ['C', 'E', 'F', 'A', 'B', 'D']
+    assert ms.top_n(df, 'R:R', 2, df['Ticker'].isin(['B', 'D', 'A']).to_numpy())['Ticker'].tolist() == ['A', 'B']
+
+def check_http_headers():
+    """API conditional GET and gzip negotiation."""
+    tag = '"abc123"'
+    for header, want in [(tag, True), ('W/"abc123"', True), ('"x", "abc123"', True), ('*', True),
+                         ('"x"', False), ('', False), (None, False), ('"abc1234"', False)]:
+        assert ms.etag_matches(header, tag) == want, header
+    for header, want in [('gzip', True), ('gzip, deflate, br', True), ('br;q=1.0, gzip;q=0.5', True),
+                         ('gzip;q=0', False), ('gzip; q=0.0', False), ('*', True), ('*;q=0', False),
+                         ('*, gzip;q=0', False), ('identity', False), ('', False), (None, False), ('GZIP', True)]:
+        assert ms.accepts_gzip(header) == want, header
+
+CHECKS = {
+    'finviz_parser': check_finviz_parser,
+    'panel_refresh': check_panel_refresh,
+    'shard_merge': check_shard_merge,
+    'render_cache': check_render_cache,
+    'top_n': check_top_n,
+    'http_headers': check_http_headers,
+    'artifacts': check_artifacts,
+    'verdict_history': check_verdict_history,
+    'quality_refetch': check_quality_refetch,
+    'quarantine_shards': check_quarantine_shards,
+    'carried_rows': check_carried_rows,
+}
+
+def run_checks(names=None):
+    failed = []
+    for name in names or CHECKS:
+        try:
+            CHECKS[name]()
+            print(f"ok   {name}")
+        except Exception as e:
+            failed.append(name)
+            print(f"FAIL {name}: {type(e).__name__}: {e}")
+    return failed
+
+# --- RESULTS / REGRESSIONS ---
+RESULTS_DIR = 'bench_results'
+
+def compare(previous, current, threshold):
+    """Flag rows where throughput dropped, or latency / peak memory grew, by more than `threshold`."""
+    prev = {(r['bench'], r['rows']): r for r in previous}
+    flags = []
+    for r in current:
+        old = prev.get((r['bench'], r['rows']))
+        if not old: continue
+        checks = [('throughput_per_s', -1), ('p95_ms', 1), ('peak_mem_mb', 1)]
+        for key, direction in checks:
+            if key not in old or not old[key]: continue
+            change = (r[key] - old[key]) / old[key]
+            if change * direction > threshold:
+                flags.append(f"{r['bench']}@{r['rows']}: {key} {old[key]} -> {r[key]} ({change:+.1%})")
+    return flags
+
+def latest_results(results_dir):
+    files = sorted(glob.glob(os.path.join(results_dir, '*.json')))
+    if not files: return None, None
+    with open(files[-1]) as f:
+        return files[-1], json.load(f)
+
+def main():
+    parser = argparse.ArgumentParser(description='Market Scanner benchmarks (offline)')
+    parser.add_argument('benches', nargs='*', default=list(BENCHMARKS) + ['memory'],
+                        help=f"Din: {', '.join(BENCHMARKS)}, memory")
+    parser.add_argument('--sizes', default='100,1000,10000,100000', help='Numar de randuri, separate prin virgula')
+    parser.add_argument('--latency-ms', type=float, default=1.0, help='Latenta simulata per request (process)')
+    parser.add_argument('--fixtures', default=FIXTURES_DIR, help='Pagini finviz salvate pentru finviz_parse (*.html)')
+    parser.add_argument('--repeat', type=int, default=3, help='Repetari pentru benchmark-urile pe tot frame-ul')
+    parser.add_argument('--no-caps', action='store_true', help=f'Ignora limitele implicite {DEFAULT_MAX_ROWS}')
+    parser.add_argument('--threshold', type=float, default=0.10, help='Prag de regresie (0.10 = 10%%)')
+    parser.add_argument('--results-dir', default=RESULTS_DIR)
+    parser.add_argument('--no-save', action='store_true', help='Nu salva rezultatele JSON')
+    parser.add_argument('--fail-on-regression', action='store_true', help='Exit code 1 daca apar regresii')
+    parser.add_argument('--check', action='store_true',
+                        help=f"Ruleaza doar verificarile de corectitudine ({', '.join(CHECKS)}); exit code 1 la esec")
+    args = parser.parse_args()
+
+    if args.check:
+        raise SystemExit(1 if run_checks() else 0)
+
+    sizes = [int(s) for s in args.sizes.split(',') if s]
+    results = []
+    for name in args.benches:
+        if name == 'memory':
+            results.extend(bench_memory([n for n in sizes if n >= 10000] or sizes))
+            continue
+        for n in sizes:
+            cap = DEFAULT_MAX_ROWS.get(name)
+            if cap and n > cap and not args.no_caps:
+                print(f"skip {name}@{n} (max {cap}, --no-caps pentru tot)")
+                continue
+            res = BENCHMARKS[name](n, args)
+            if res is None: continue
+            print(res)
+            results.append(res)
+
+    prev_path, previous = latest_results(args.results_dir)
+    if previous:
+        flags = compare(previous['results'], results, args.threshold)
+        print(f"\nComparat cu {prev_path}: {len(flags)} regresii")
+        for flag in flags: print(f"  REGRESIE {flag}")
+    else:
+        flags = []
+
+    if not args.no_save:
+        os.makedirs(args.results_dir, exist_ok=True)
+        stamp = datetime.datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')
+        path = os.path.join(args.results_dir, f"{stamp}.json")
+        with open(path, 'w') as f:
+            json.dump({'created': stamp, 'args': vars(args), 'results': results}, f, indent=1)
+        print(f"Rezultate salvate: {path}")
+
+    if flags and args.fail_on_regression:
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
@@ -10,12 +10,32 @@ import requests
 import math
 import argparse
 import pytz
+import collections
+import gzip
+import hashlib
+import http.server
+import queue
+import threading
+import heapq
+import re
+import json
+import subprocess
+import sys
+import zlib
+import contextlib
+import concurrent.futures
+import numpy as np
+import lxml.html
+import marshal
+import itertools
+import fcntl
 
 # --- CONFIGURARE ---
 TICKERS_FILE = 'tickers.txt'
 CUSTOM_TICKERS_FILE = 'custom_tickers.txt'
 OUTPUT_CSV = 'market_scan_extended.csv'
 OUTPUT_HTML = 'index.html'
+CACHE_DIR = 'cache'  # stare persistata intre rulari (actions/cache in workflow)
 
 def load_tickers(filename):
     try:
@@ -42,7 +62,7 @@ def generate_sparkline(data_list, color="#4caf50", width=120, height=40):
         x = i * step
         # Flip Y axis because SVG 0 is top
         y = height - ((val - min_val) / val_range * height)
-        points.append(f"{x},{y}")
+        points.append(f"{x:.1f},{y:.1f}")
         
     polyline = f'<polyline points="{" ".join(points)}" fill="none" stroke="{color}" stroke-width="2" />'
     return f'<svg width="{width}" height="{height}" xmlns="http://www.w3.org/2000/svg">{polyline}</svg>'
@@ -92,6 +112,291 @@ def get_finviz_breadth():
         print(f"Eroare Breadth: {e}")
         return {'sma200_pct': 50.0, 'highs_lows': 0, 'valid': False}
 
+# --- OHLC PANEL STORE (memory-mapped: un fisier .npy per camp, tickers x date) ---
+PANEL_DIR = os.path.join(CACHE_DIR, 'ohlc_panel')
+CORTEX_PANEL_DIR = os.path.join(CACHE_DIR, 'cortex_panel')
+PANEL_FIELDS = ['Open', 'High', 'Low', 'Close', 'Volume']
+PANEL_HISTORY_PERIOD = '1y'    # prima descarcare / simbol nou
+PANEL_BATCH = 200              # simboluri per yf.download
+PANEL_DATE_SLACK = 260         # ~1 an de bare noi adaugate in loc, fara rescriere
+PANEL_STALE_DAYS = 30          # simboluri fara bare de mai mult timp descarca doar ultimele 30 de zile
+EPOCH_DAY = np.datetime64('1970-01-01', 'D')
+SPARK_BARS = 22                # ~1 luna, ca inainte
+
+OHLC_PANEL = None              # panel-ul deschis read-only pentru rularea curenta
+PANEL_OWNER = False            # procesul asta a facut refresh-ul (nu e un worker --panel-readonly)
+
+def open_ohlc_panel(path=None, mode='r'):
+    """Open a panel store; arrays are np.memmap views (tickers x dates), shared zero-copy between processes.
+
+    Returns None when the store does not exist yet.
+    """
+    path = path or PANEL_DIR
+    meta = load_json(os.path.join(path, 'meta.json'))
+    if not meta: return None
+    n_t, n_d = len(meta['tickers']), len(meta['dates'])
+    fields = {f: np.load(os.path.join(path, f"{f}.npy"), mmap_mode=mode)[:n_t, :n_d] for f in meta['fields']}
+    return {
+        'path': path, 'meta': meta, 'tickers': meta['tickers'],
+        'ticker_index': {t: i for i, t in enumerate(meta['tickers'])},
+        'dates': EPOCH_DAY + np.asarray(meta['dates'], dtype='int64'),
+        'fields': fields,
+    }
+
+def normalize_ohlc(frame, symbols):
+    """yf.download output -> {field: DataFrame(dates x tickers)} with day-resolution dates."""
+    if frame is None or frame.empty: return {}
+    if not isinstance(frame.columns, pd.MultiIndex):
+        frame = pd.concat({symbols[0]: frame}, axis=1).swaplevel(axis=1)
+    index = pd.to_datetime(frame.index)
+    if index.tz is not None: index = index.tz_localize(None)
+    frame = frame.set_axis(index.normalize(), axis=0)
+    frame = frame[~frame.index.duplicated(keep='last')].sort_index()
+    return {f: frame[f].astype('float64') for f in PANEL_FIELDS if f in frame.columns.get_level_values(0)}
+
+def _rewrite_panel(path, meta, tickers, days, fields):
+    """Re-lay the arrays for a new ticker / date axis (new capacity), copying the old values across."""
+    old = open_ohlc_panel(path)
+    t_cap = max(64, int(len(tickers) * 1.25))
+    d_cap = len(days) + PANEL_DATE_SLACK
+    for f in fields:
+        tmp = os.path.join(path, f"{f}.npy.tmp")
+        arr = np.lib.format.open_memmap(tmp, mode='w+', dtype=np.float32, shape=(t_cap, d_cap))
+        arr[:] = np.nan
+        if old is not None and f in old['fields']:
+            rows = np.arange(len(old['tickers']))
+            cols = np.searchsorted(days, np.asarray(old['meta']['dates'], dtype='int64'))
+            arr[np.ix_(rows, cols)] = old['fields'][f]
+        arr.flush()
+        del arr
+        os.replace(tmp, os.path.join(path, f"{f}.npy"))
+    meta.update({'ticker_capacity': t_cap, 'date_capacity': d_cap})
+
+def panel_append(frame, symbols, path=None):
+    """Write downloaded bars into the store.
+
+    Bars on stored dates overwrite in place (the last bar is refreshed intraday), bars after
+    the last stored date are appended in place while capacity lasts. New tickers, exhausted
+    capacity or back-filled dates rewrite the arrays once. NaN in `frame` never erases stored values.
+    """
+    path = path or PANEL_DIR
+    data = normalize_ohlc(frame, symbols)
+    if not data: return 0
+    os.makedirs(path, exist_ok=True)
+    meta = load_json(os.path.join(path, 'meta.json')) or {
+        'tickers': [], 'dates': [], 'fields': PANEL_FIELDS, 'ticker_capacity': 0, 'date_capacity': 0}
+
+    incoming = next(iter(data.values()))
+    in_days = (incoming.index.values.astype('datetime64[D]') - EPOCH_DAY).astype('int64')
+    in_tickers = list(incoming.columns)
+    known = set(meta['tickers'])
+    tickers = meta['tickers'] + [t for t in in_tickers if t not in known]
+
+    old_days = np.asarray(meta['dates'], dtype='int64')
+    last = old_days[-1] if len(old_days) else np.iinfo('int64').min
+    backfill = np.setdiff1d(in_days[in_days <= last], old_days)
+    days = np.union1d(old_days, in_days)
+
+    if (len(backfill) or len(tickers) > meta['ticker_capacity'] or len(days) > meta['date_capacity']):
+        _rewrite_panel(path, meta, tickers, days, meta['fields'])
+    meta['tickers'], meta['dates'] = tickers, days.tolist()
+
+    index = {t: i for i, t in enumerate(tickers)}
+    rows = np.array([index[t] for t in in_tickers])
+    cols = np.searchsorted(days, in_days)
+    for f, values in data.items():
+        arr = np.load(os.path.join(path, f"{f}.npy"), mmap_mode='r+')
+        block = arr[np.ix_(rows, cols)]
+        new = values[in_tickers].to_numpy(dtype=np.float32).T
+        arr[np.ix_(rows, cols)] = np.where(np.isnan(new), block, new)
+        arr.flush()
+        del arr
+    # meta la final: cititorii vad fie starea veche, fie cea noua
+    save_json(os.path.join(path, 'meta.json'), meta)
+    return len(in_tickers)
+
+def panel_last_dates(panel, symbols):
+    """{symbol: last date with a Close} for the symbols already in the store."""
+    if panel is None: return {}
+    close = panel['fields']['Close']
+    out = {}
+    for s in symbols:
+        i = panel['ticker_index'].get(s)
+        if i is None: continue
+        valid = np.flatnonzero(~np.isnan(close[i]))
+        if valid.size: out[s] = panel['dates'][valid[-1]]
+    return out
+
+def refresh_groups(last, symbols, today=None):
+    """[(start date, symbols)] for the incremental download: one group per week of last bar.
+
+    Symbols whose last bar is older than PANEL_STALE_DAYS (delisted, renamed) start at that cap,
+    so one dead ticker does not pull the whole window again for everyone else.
+    """
+    floor = np.datetime64(today or datetime.date.today(), 'D') - PANEL_STALE_DAYS
+    starts = {s: max(last[s], floor) for s in symbols}
+    groups = collections.defaultdict(list)
+    for s in symbols:
+        groups[int((starts[s] - EPOCH_DAY).astype('int64')) // 7].append(s)
+    return [(str(min(starts[s] for s in group)), group) for _, group in sorted(groups.items())]
+
+def download_ohlc(symbols, **kwargs):
+    return yf.download(symbols, interval="1d", progress=False, threads=True, **kwargs)
+
+def refresh_ohlc_panel(symbols, path=None, label="OHLC panel"):
+    """Bring the store up to date: stored symbols from their last bar onwards (see refresh_groups), new ones get a full year."""
+    path = path or PANEL_DIR
+    last = panel_last_dates(open_ohlc_panel(path), symbols)
+    fresh = [s for s in symbols if s not in last]
+    known = [s for s in symbols if s in last]
+    try:
+        for k in range(0, len(fresh), PANEL_BATCH):
+            batch = fresh[k:k + PANEL_BATCH]
+            print(f"{label}: istoric complet ({PANEL_HISTORY_PERIOD}) pentru {len(batch)} simboluri")
+            panel_append(download_ohlc(batch, period=PANEL_HISTORY_PERIOD), batch, path)
+        for start, group in refresh_groups(last, known):
+            print(f"{label}: bare noi de la {start} pentru {len(group)} simboluri")
+            for k in range(0, len(group), PANEL_BATCH):
+                batch = group[k:k + PANEL_BATCH]
+                panel_append(download_ohlc(batch, start=start), batch, path)
+    except Exception as e:
+        print(f"Eroare update {label} (folosesc datele locale): {e}")
+    return open_ohlc_panel(path)
+
+def panel_slice(panel, tickers=None, start=None, end=None, field='Close'):
+    """DataFrame (dates x tickers) for a ticker set and an inclusive date range."""
+    if panel is None: return pd.DataFrame()
+    tickers = [t for t in (tickers or panel['tickers']) if t in panel['ticker_index']]
+    dates = panel['dates']
+    lo = np.searchsorted(dates, np.datetime64(start, 'D')) if start is not None else 0
+    hi = np.searchsorted(dates, np.datetime64(end, 'D'), side='right') if end is not None else len(dates)
+    rows = [panel['ticker_index'][t] for t in tickers]
+    values = panel['fields'][field][rows, lo:hi].T
+    return pd.DataFrame(values, index=pd.DatetimeIndex(dates[lo:hi]), columns=tickers)
+
+def panel_history(panel, ticker, bars=None):
+    """OHLCV of one ticker (rows with a Close), last `bars` rows; None if the ticker is not stored."""
+    if panel is None or ticker not in panel['ticker_index']: return None
+    i = panel['ticker_index'][ticker]
+    hist = pd.DataFrame({f: arr[i] for f, arr in panel['fields'].items()},
+                        index=pd.DatetimeIndex(panel['dates'])).dropna(subset=['Close'])
+    return hist.iloc[-bars:] if bars else hist
+
+def prepare_ohlc_panel(tickers, refresh=True):
+    """Refresh the panel for this run's tickers (unless another process already did) and open it read-only."""
+    global OHLC_PANEL, PANEL_OWNER
+    OHLC_PANEL = refresh_ohlc_panel(tickers) if refresh else open_ohlc_panel()
+    PANEL_OWNER = refresh
+    return OHLC_PANEL
+
+def get_price_history(ticker, yf_ticker, bars=SPARK_BARS):
+    hist = panel_history(OHLC_PANEL, ticker, bars)
+    if hist is not None and not hist.empty:
+        return hist
+    return limited_call('yahoo', yf_ticker.history, period="1mo")
+
+# --- SPARKLINES MULTI-TIMEFRAME (din panel, comutate in browser) ---
+SPARK_TIMEFRAMES = (('1W', 5, 1), ('1M', 22, 1), ('3M', 63, 1), ('1Y', 250, 5))  # (eticheta, bare zilnice, pas)
+SPARK_DEFAULT_TF = '1M'        # varianta randata ca SVG pe server
+SPARK_ALPHABET = np.frombuffer(b'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_.', dtype='S1')
+SPARK_LEVELS = 64              # un caracter per punct; '.' = fara bara
+SPARK_WINDOW = max(bars for _, bars, _ in SPARK_TIMEFRAMES)
+
+def spark_closes(panel, tickers, fallback=None):
+    """Closes (tickers x SPARK_WINDOW, right-aligned, NaN = no bar) from the panel.
+
+    Tickers missing from the panel use their `fallback` series (the row's 1M Spark) instead.
+    """
+    out = np.full((len(tickers), SPARK_WINDOW), np.nan)
+    index = panel['ticker_index'] if panel is not None else {}
+    hits = [(k, index[t]) for k, t in enumerate(tickers) if t in index]
+    if hits:
+        ks, rows = zip(*hits)
+        closes = panel['fields']['Close'][list(rows), -SPARK_WINDOW:]
+        out[list(ks), SPARK_WINDOW - closes.shape[1]:] = closes
+    for k, t in enumerate(tickers):
+        if t not in index and fallback is not None and len(fallback[k]):
+            tail = np.asarray(fallback[k], dtype=np.float64)[-SPARK_WINDOW:]
+            out[k, SPARK_WINDOW - len(tail):] = tail
+    return out
+
+def encode_sparks(closes):
+    """One 'TF:levels ...' string per row of `closes`; each level is one char of SPARK_ALPHABET.
+
+    Gaps are squeezed out first (valid bars right-aligned), then every timeframe is a strided
+    tail of the same matrix, scaled to 0..SPARK_LEVELS-1 per row. Timeframes with < 2 bars are left out.
+    """
+    closes = np.asarray(closes, dtype=np.float64)
+    n, width = closes.shape
+    if not width: return [""] * n
+    order = np.argsort(~np.isnan(closes), axis=1, kind='stable')
+    packed = np.take_along_axis(closes, order, axis=1)
+    encoded = []
+    for label, bars, step in SPARK_TIMEFRAMES:
+        win = packed[:, np.arange(width - 1, max(width - 1 - bars, -1), -step)[::-1]]
+        lo = np.fmin.reduce(win, axis=1, keepdims=True)
+        span = np.fmax.reduce(win, axis=1, keepdims=True) - lo
+        span[span == 0] = 1
+        levels = np.rint((win - lo) / span * (SPARK_LEVELS - 1))
+        idx = np.where(np.isnan(levels), SPARK_LEVELS, levels).astype(np.intp)
+        chars = np.ascontiguousarray(SPARK_ALPHABET[idx]).view(f'S{win.shape[1]}').ravel()
+        encoded.append((label, [c.decode().lstrip('.') for c in chars]))
+    return [" ".join(f"{label}:{codes[k]}" for label, codes in encoded if len(codes[k]) > 1) for k in range(n)]
+
+SPARK_SCRIPT = """<script>
+        // data-spark="1W:... 1M:..." -> redeseneaza polyline-ul din SVG pentru timeframe-ul ales
+        var SPARK_CHARS = 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_';
+        window.sparkTf = '%s';
+        function drawSparks(root) {
+            root.querySelectorAll('[data-spark]').forEach(function (el) {
+                var line = el.querySelector('polyline'), svg = el.querySelector('svg');
+                var code = (' ' + el.dataset.spark).split(' ' + window.sparkTf + ':')[1];
+                if (!line || !code) return;
+                code = code.split(' ')[0];
+                var w = +svg.getAttribute('width'), h = +svg.getAttribute('height'), pts = [];
+                for (var i = 0; i < code.length; i++) {
+                    var lvl = SPARK_CHARS.indexOf(code[i]);
+                    pts.push((i * w / (code.length - 1)).toFixed(1) + ',' + (h - lvl / %d * h).toFixed(1));
+                }
+                line.setAttribute('points', pts.join(' '));
+                if ('sparkTrend' in el.dataset) {
+                    var up = SPARK_CHARS.indexOf(code[code.length - 1]) >= SPARK_CHARS.indexOf(code[0]);
+                    line.setAttribute('stroke', up ? '#4caf50' : '#f44336');
+                }
+            });
+        }
+        document.addEventListener('click', function (e) {
+            var btn = e.target.closest('[data-spark-tf]');
+            if (!btn) return;
+            window.sparkTf = btn.dataset.sparkTf;
+            document.querySelectorAll('[data-spark-tf]').forEach(function (b) { b.classList.toggle('active', b === btn); });
+            drawSparks(document);
+        });
+    </script>""" % (SPARK_DEFAULT_TF, SPARK_LEVELS - 1)
+
+def spark_toggle():
+    """Button group that switches every sparkline on the page (rows and cortex cards)."""
+    buttons = "".join(f'<button type="button" class="btn btn-outline-secondary{" active" if label == SPARK_DEFAULT_TF else ""}" '
+                      f'data-spark-tf="{label}">{label}</button>' for label, _, _ in SPARK_TIMEFRAMES)
+    return f'<div class="btn-group btn-group-sm me-2" role="group" title="Interval grafice">{buttons}</div>'
+
+# --- CORTEX SERIES (din panel-ul cortex) ---
+def load_cortex_store(path=None):
+    """Daily closes of the cortex symbols (dates x Yahoo tickers)."""
+    panel = open_ohlc_panel(path or CORTEX_PANEL_DIR)
+    return panel_slice(panel).astype("float64").dropna(how="all") if panel is not None else pd.DataFrame()
+
+def update_cortex_store(symbols, path=None):
+    """Update the cortex panel incrementally and return its closes."""
+    refresh_ohlc_panel(symbols, path or CORTEX_PANEL_DIR, label="Cortex store")
+    return load_cortex_store(path)
+
+def percentile_rank(series, window=252):
+    """Percent of the last `window` closes at or below the latest one."""
+    tail = series.dropna().iloc[-window:]
+    if tail.empty: return None
+    return round(float((tail <= tail.iloc[-1]).mean() * 100), 1)
+
 def get_market_cortex_data():
     print("\nPreiau date Market Cortex (yfinance)...")
     
@@ -114,7 +419,7 @@ def get_market_cortex_data():
     
     tickers_list = list(indices.values())
     try:
-        data = yf.download(tickers_list, period="1mo", interval="1d", progress=False)['Close']
+        data = update_cortex_store(tickers_list)
         
         for name, ticker in indices.items():
             try:
@@ -124,7 +429,8 @@ def get_market_cortex_data():
                 current_price = series.iloc[-1]
                 prev_price = series.iloc[-2] if len(series) > 1 else current_price
                 change = current_price - prev_price
-                spark_data = series.tolist()
+                spark_data = series.iloc[-SPARK_BARS:].tolist()
+                spark_tf = encode_sparks(series.to_numpy()[None, -SPARK_WINDOW:])[0]
                 
                 status = "NORMAL"
                 status_color = "#888"
@@ -147,10 +453,12 @@ def get_market_cortex_data():
                 cortex_data[name] = {
                     'value': round(current_price, 2),
                     'change': round(change, 2),
-                    'sparkline': generate_sparkline(spark_data, color=color),
+                    'sparkline': cached_sparkline(spark_data, color=color),
+                    'spark_tf': spark_tf,
                     'status': status,
                     'status_color': status_color,
-                    'text_color': "text-success" if color=="#4caf50" else "text-danger"
+                    'text_color': "text-success" if color=="#4caf50" else "text-danger",
+                    'pct_1y': percentile_rank(series)
                 }
             except Exception as e:
                 cortex_data[name] = {
@@ -195,13 +503,230 @@ def get_market_cortex_data():
     cortex_data['breadth_valid'] = breadth.get('valid', False)
     return cortex_data
 
-def calculate_verdict(cortex):
+# --- PUT/CALL DIN LANTURI DE OPTIUNI (cache per expirare) ---
+OPTIONS_DIR = os.path.join(CACHE_DIR, 'options')   # <SIMBOL>/<expirare>.npy + expiries.json
+PUTCALL_INDEX = ['SPY', 'QQQ', 'IWM']              # proxy-uri pentru piata (SPX)
+OPTIONS_MAX_EXPIRIES = 8       # cele mai apropiate expirari per simbol
+OPTIONS_WORKERS = 8            # simboluri in paralel; limita reala pe Yahoo o da HostLimiter
+OPTIONS_TTL_MIN = 30           # lanturi care expira in <= 7 zile
+OPTIONS_FAR_TTL_MIN = 240      # expirari mai indepartate se misca mai incet
+EXPIRIES_TTL_MIN = 720
+CHAIN_FIELDS = ['put', 'strike', 'openInterest', 'volume']   # coloanele array-ului salvat (float32)
+PUTCALL_STATE_FILE = os.path.join(OPTIONS_DIR, 'index_putcall.json')
+OPTIONS_STATS = collections.Counter()
+
+def options_path(symbol, name):
+    return os.path.join(OPTIONS_DIR, symbol.replace('^', '_'), name)
+
+def is_fresh(path, ttl_min):
+    """File exists and is younger than ttl_min minutes (ttl_min None = any age)."""
     try:
-        vix = cortex['VIX']['value']
-        vix3m = cortex['VIX3M']['value']
-        term_structure = round(vix3m / vix, 2) if vix > 0 else 1.0
-    except:
-        term_structure = 1.0
+        age = time.time() - os.path.getmtime(path)
+    except OSError:
+        return False
+    return ttl_min is None or age < ttl_min * 60
+
+def chain_ttl(expiry, today=None):
+    days = (datetime.date.fromisoformat(expiry) - (today or datetime.date.today())).days
+    return OPTIONS_TTL_MIN if days <= 7 else OPTIONS_FAR_TTL_MIN
+
+def chain_to_array(chain):
+    """yfinance option_chain (calls, puts) -> float32 array, one row per contract, CHAIN_FIELDS columns."""
+    parts = [np.column_stack([np.full(len(frame), side), frame['strike'],
+                              frame['openInterest'].fillna(0), frame['volume'].fillna(0)])
+             for side, frame in ((0, chain.calls), (1, chain.puts))]
+    return np.concatenate(parts).astype(np.float32) if parts else np.empty((0, len(CHAIN_FIELDS)), np.float32)
+
+def save_chain(path, arr):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, 'wb') as f: np.save(f, arr)
+    os.replace(tmp, path)
+
+def option_expiries(symbol, fetch=True):
+    """Nearest expiries for `symbol` (cached list); a failed fetch falls back to the stale list."""
+    path = options_path(symbol, 'expiries.json')
+    today = datetime.date.today().isoformat()
+    if fetch and not is_fresh(path, EXPIRIES_TTL_MIN):
+        try:
+            expiries = list(guarded_call('options', symbol, lambda: limited_call('yahoo', lambda: yf_handle(symbol).options)))
+            if not expiries: raise LookupError(f"{symbol}: fara optiuni listate")
+            save_json(path, expiries)
+        except Exception as e:
+            if not isinstance(e, Quarantined): OPTIONS_STATS['errors'] += 1
+    return [e for e in load_json(path, []) if e >= today][:OPTIONS_MAX_EXPIRIES]
+
+def option_chain(symbol, expiry, fetch=True):
+    """Chain array for one expiry: from the cache while fresh, else Yahoo; stale cache if the fetch fails."""
+    path = options_path(symbol, f"{expiry}.npy")
+    if is_fresh(path, chain_ttl(expiry)) or not fetch:
+        try:
+            arr = np.load(path)
+            OPTIONS_STATS['cached'] += 1
+            return arr
+        except (OSError, ValueError):
+            if not fetch: return None
+    try:
+        chain = guarded_call('options', symbol, lambda: limited_call('yahoo', yf_handle(symbol).option_chain, expiry))
+        arr = chain_to_array(chain)
+        save_chain(path, arr)
+        OPTIONS_STATS['fetched'] += 1
+        return arr
+    except Exception as e:
+        if not isinstance(e, Quarantined): OPTIONS_STATS['errors'] += 1
+        try:
+            return np.load(path)
+        except (OSError, ValueError):
+            return None
+
+def prune_chains(symbol, today=None):
+    """Drop cached chains of expiries that already passed."""
+    today = (today or datetime.date.today()).isoformat()
+    for path in glob.glob(options_path(symbol, '*.npy')):
+        if os.path.basename(path)[:-4] < today: os.remove(path)
+
+def symbol_chains(symbol, fetch=True):
+    """All cached/fetched chain arrays of one symbol (nearest OPTIONS_MAX_EXPIRIES expiries)."""
+    prune_chains(symbol)
+    chains = (option_chain(symbol, e, fetch) for e in option_expiries(symbol, fetch))
+    return [c for c in chains if c is not None and len(c)]
+
+def collect_option_chains(symbols, fetch=True):
+    """{symbol: [chain arrays]} for every symbol, OPTIONS_WORKERS symbols at a time."""
+    symbols = list(dict.fromkeys(symbols))
+    if not symbols: return {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=min(OPTIONS_WORKERS, len(symbols))) as pool:
+        return dict(zip(symbols, pool.map(lambda s: symbol_chains(s, fetch), symbols)))
+
+def putcall_table(chains):
+    """Per-symbol put/call totals from all expiries at once (one bincount per measure).
+
+    Columns: call_oi, put_oi, call_volume, put_volume, expiries, pc_volume, pc_oi, pc
+    (pc = volume ratio, or the open-interest ratio when the session has no volume yet).
+    """
+    symbols = [s for s, arrs in chains.items() if arrs]
+    cols = ['call_oi', 'put_oi', 'call_volume', 'put_volume', 'expiries', 'pc_volume', 'pc_oi', 'pc']
+    if not symbols: return pd.DataFrame(columns=cols, dtype='float64')
+    arrays = [a for s in symbols for a in chains[s]]
+    codes = np.repeat(np.arange(len(symbols)), [len(chains[s]) for s in symbols])
+    rows = np.repeat(codes, [len(a) for a in arrays])
+    data = np.concatenate(arrays).astype(np.float64)
+    key = rows * 2 + (data[:, 0] > 0)
+    oi = np.bincount(key, weights=data[:, 2], minlength=2 * len(symbols)).reshape(-1, 2)
+    vol = np.bincount(key, weights=data[:, 3], minlength=2 * len(symbols)).reshape(-1, 2)
+    table = pd.DataFrame({'call_oi': oi[:, 0], 'put_oi': oi[:, 1], 'call_volume': vol[:, 0], 'put_volume': vol[:, 1],
+                          'expiries': np.bincount(codes, minlength=len(symbols))}, index=symbols)
+    return with_ratios(table)
+
+def with_ratios(table):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        table['pc_volume'] = np.where(table['call_volume'] > 0, table['put_volume'] / table['call_volume'], np.nan)
+        table['pc_oi'] = np.where(table['call_oi'] > 0, table['put_oi'] / table['call_oi'], np.nan)
+    table['pc'] = table['pc_volume'].fillna(table['pc_oi']).round(2)
+    return table
+
+def index_putcall(table, proxies=PUTCALL_INDEX):
+    """Market-level ratio: totals summed over the SPX proxies, then divided."""
+    rows = table.reindex([p for p in proxies if p in table.index])
+    if rows.empty: return None
+    total = with_ratios(rows[['call_oi', 'put_oi', 'call_volume', 'put_volume']].sum().to_frame().T)
+    pc = total['pc'].iloc[0]
+    return None if pd.isna(pc) else float(pc)
+
+def putcall_card(table):
+    """Cortex card for the index put/call ratio; change is vs. the previous day's value."""
+    pc = index_putcall(table)
+    if pc is None:
+        return {'value': 'N/A', 'change': 0, 'sparkline': "", 'status': "N/A", 'status_color': "#444", 'text_color': "text-muted"}
+    today = datetime.date.today().isoformat()
+    state = load_json(PUTCALL_STATE_FILE, {})
+    prev = state.get('prev') if state.get('date') == today else state.get('value')
+    save_json(PUTCALL_STATE_FILE, {'date': today, 'value': pc, 'prev': prev})
+    if pc > 1.0: status, color = "FEAR", "#4caf50"          # contrarian: frica = semnal bullish
+    elif pc < 0.6: status, color = "COMPLACENCY", "#f44336"
+    else: status, color = "NORMAL", "#888"
+    return {'value': round(pc, 2), 'change': round(pc - prev, 2) if prev is not None else 0, 'sparkline': "",
+            'status': status, 'status_color': color, 'text_color': "text-success" if pc > 1.0 else "text-danger" if pc < 0.6 else "text-white"}
+
+def get_putcall_data(tickers, fetch=True):
+    """Option chains for the SPX proxies + scanned tickers -> (putcall_table, cortex card)."""
+    print("Preiau lanturi de optiuni (Put/Call)...")
+    t0 = time.perf_counter()
+    OPTIONS_STATS.clear()
+    chains = collect_option_chains(PUTCALL_INDEX + list(tickers), fetch)
+    table = putcall_table(chains)
+    RUN_REPORT['options'] = dict(OPTIONS_STATS, symbols=len(chains), with_chains=len(table),
+                                 seconds=round(time.perf_counter() - t0, 2))
+    print(f"Put/Call: {len(table)}/{len(chains)} simboluri cu optiuni, {OPTIONS_STATS['fetched']} lanturi descarcate, "
+          f"{OPTIONS_STATS['cached']} din cache")
+    return table, putcall_card(table)
+
+def add_putcall(df, table):
+    """Per-ticker 'P/C' column (0 = no option data)."""
+    if df is None or df.empty: return df
+    df = df.copy()
+    df['P/C'] = df['Ticker'].map(table['pc']).fillna(0).astype('float32') if len(table) else np.float32(0)
+    return df
+
+# --- VERDICT (vectorizat: snapshot = ultimul rand dintr-un panel) ---
+VERDICT_INPUTS = ['vix', 'vix3m', 'vix_change', 'sma200_pct', 'highs_lows', 'crypto_fear', 'move']
+
+def round_half_even(values, decimals=2):
+    """Vectorized equivalent of Python's round(x, decimals).
+
+    np.round multiplies in float64 and can land on the other side of a .5 boundary;
+    x * 10**decimals is exact in long double (x86), so rint on it rounds like round().
+    """
+    scale = 10 ** decimals
+    scaled = np.asarray(values, dtype=np.longdouble) * scale
+    return np.rint(scaled).astype('float64') / scale
+
+def score_verdict_arrays(cols, n):
+    """Core of the verdict: `cols` maps VERDICT_INPUTS names to length-n arrays (NaN = unknown, no points)."""
+    col = lambda name: np.asarray(cols[name], dtype='float64') if name in cols else np.full(n, np.nan)
+    vix, vix3m = col('vix'), col('vix3m')
+    with np.errstate(divide='ignore', invalid='ignore'):
+        term = np.where(vix > 0, round_half_even(vix3m / vix), 1.0)
+    term = np.where(np.isnan(term), 1.0, term)
+
+    score = np.full(n, 10.0)
+    score += np.where(term > 1.1, 20, np.where(term < 1.0, -20, 0))
+    score += 20 * (col('vix_change') < 0)
+    score += 20 * (col('sma200_pct') > 50)
+    score += 10 * (col('highs_lows') > 0)
+    score += 10 * (col('crypto_fear') > 45)
+    score += 10 * (col('move') < 110)
+    score = np.clip(score, 0, 100).astype(int)
+
+    signal = np.where(score >= 75, 'BUY', np.where(score <= 35, 'SELL', 'HOLD'))
+    return term, score, signal
+
+def verdict_scores(panel):
+    """Score an entire panel of regime inputs at once.
+
+    `panel` has the VERDICT_INPUTS columns, one row per date. Returns a frame with
+    term_val, score and signal aligned to the panel index.
+    """
+    term, score, signal = score_verdict_arrays({c: panel[c].to_numpy() for c in VERDICT_INPUTS if c in panel}, len(panel))
+    return pd.DataFrame({'term_val': term, 'score': score, 'signal': signal}, index=panel.index)
+
+def cortex_to_verdict_inputs(cortex):
+    """One panel row from the current cortex snapshot (unparsable values -> NaN)."""
+    def num(name, key='value'):
+        try: return float(str(cortex[name][key]).replace('%', ''))
+        except (KeyError, TypeError, ValueError): return np.nan
+    return {
+        'vix': num('VIX'), 'vix3m': num('VIX3M'), 'vix_change': num('VIX', 'change'),
+        'sma200_pct': num('SMA200%'), 'highs_lows': num('Highs-Lows'),
+        'crypto_fear': num('CRYPTO FEAR'), 'move': num('MOVE'),
+    }
+
+def calculate_verdict(cortex):
+    # Acelasi cod ca pentru panel-ul istoric, pe un singur rand
+    term, score, signal = score_verdict_arrays({k: [v] for k, v in cortex_to_verdict_inputs(cortex).items()}, 1)
+    term_structure = float(term[0])
+    score = int(score[0])
+    final_signal = str(signal[0])
 
     term_text = "Contango (Normal)"
     term_color = "text-success"
@@ -211,37 +736,8 @@ def calculate_verdict(cortex):
     elif term_structure < 1.1:
         term_text = "Flat (Caution)"
         term_color = "text-warning"
-        
-    score = 10 
-    if term_structure > 1.1: score += 20
-    elif term_structure < 1.0: score -= 20
-    
-    if cortex['VIX']['change'] < 0: score += 20
-    
-    try:
-        sma_str = cortex['SMA200%']['value'].replace('%','')
-        if float(sma_str) > 50: score += 20
-    except: pass
-    
-    try:
-        hl_val = int(cortex['Highs-Lows']['value'])
-        if hl_val > 0: score += 10
-    except: pass
-        
-    if cortex['CRYPTO FEAR']['value'] > 45: score += 10
-    if cortex['MOVE']['value'] < 110: score += 10
-
-    score = max(0, min(100, score))
-    
-    final_signal = "HOLD"
-    signal_color = "text-warning"
     
-    if score >= 75:
-        final_signal = "BUY"
-        signal_color = "text-success"
-    elif score <= 35:
-        final_signal = "SELL"
-        signal_color = "text-danger"
+    signal_color = {"BUY": "text-success", "SELL": "text-danger"}.get(final_signal, "text-warning")
         
     bull_prob = score
     bear_prob = 100 - score
@@ -261,67 +757,587 @@ def calculate_verdict(cortex):
         'sentiment': int(bull_prob)
     }
 
-def clean_value(value):
-    if not value or value == '-': return ""
-    return str(value).replace('$', '').replace('%', '').replace(',', '').strip()
+def get_crypto_fear_history(limit=400):
+    """Daily Crypto Fear & Greed values indexed by date (empty Series on failure)."""
+    try:
+        r = requests.get(f"https://api.alternative.me/fng/?limit={limit}", timeout=10)
+        data = r.json()['data']
+        dates = pd.to_datetime([int(d['timestamp']) for d in data], unit='s').normalize()
+        return pd.Series([int(d['value']) for d in data], index=dates).sort_index()
+    except Exception as e:
+        print(f"Eroare istoric Crypto Fear: {e}")
+        return pd.Series(dtype='float64')
+
+# Breadth (SMA200%, Highs-Lows) vine doar din snapshot-ul Finviz al zilei: il pastram o data pe zi
+BREADTH_HISTORY_FILE = os.path.join(CACHE_DIR, 'breadth_history.csv')
+BREADTH_INPUTS = ['sma200_pct', 'highs_lows']
 
-def parse_float(value):
-    try: return float(clean_value(value))
-    except: return 0.0
+def load_breadth_history(path=None):
+    try:
+        return pd.read_csv(path or BREADTH_HISTORY_FILE, index_col='date', parse_dates=['date'])[BREADTH_INPUTS]
+    except (FileNotFoundError, pd.errors.EmptyDataError, KeyError, ValueError):
+        return pd.DataFrame(columns=BREADTH_INPUTS)
+
+def record_breadth(cortex, path=None, day=None):
+    """Store today's breadth inputs (one row per date, last run of the day wins); returns the whole history."""
+    path = path or BREADTH_HISTORY_FILE
+    history = load_breadth_history(path)
+    inputs = cortex_to_verdict_inputs(cortex)
+    if not cortex.get('breadth_valid', True) or any(np.isnan(inputs[c]) for c in BREADTH_INPUTS):
+        return history
+    history.loc[pd.Timestamp(day or datetime.date.today())] = [inputs[c] for c in BREADTH_INPUTS]
+    history = history.sort_index()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    write_csv_atomic(history.rename_axis('date').reset_index(), path)
+    return history
+
+def build_verdict_panel(store, fng_history=None, breadth=None):
+    """Historical VERDICT_INPUTS panel from the cortex store.
+
+    Breadth (SMA200%, Highs-Lows) exists only for the dates recorded by record_breadth;
+    the other dates keep NaN there.
+    """
+    if store is None or store.empty or '^VIX' not in store:
+        return pd.DataFrame(columns=VERDICT_INPUTS)
+    vix = store['^VIX']
+    breadth = breadth.reindex(store.index) if breadth is not None and not breadth.empty else {}
+    panel = pd.DataFrame({
+        'vix': vix,
+        'vix3m': store.get('^VIX3M', np.nan),
+        'vix_change': vix.diff(),
+        'sma200_pct': breadth.get('sma200_pct', np.nan),
+        'highs_lows': breadth.get('highs_lows', np.nan),
+        'crypto_fear': fng_history.reindex(store.index) if fng_history is not None and not fng_history.empty else np.nan,
+        'move': store.get('^MOVE', np.nan),
+    }, index=store.index)
+    return panel.dropna(subset=['vix'])
+
+def calculate_verdict_history(cortex, store=None, fng_history=None, breadth=None):
+    """Verdict for every stored date; the last row is the live snapshot, so it matches calculate_verdict.
+
+    Rows without breadth can score at most 70 (< the BUY threshold), so they are marked
+    `partial` and get no signal instead of a capped one.
+    """
+    panel = build_verdict_panel(load_cortex_store() if store is None else store,
+                                get_crypto_fear_history() if fng_history is None else fng_history,
+                                record_breadth(cortex) if breadth is None else breadth)
+    today = pd.Timestamp(datetime.date.today())
+    panel.loc[today] = cortex_to_verdict_inputs(cortex)
+    history = pd.concat([panel, verdict_scores(panel)], axis=1)
+    history['partial'] = panel[BREADTH_INPUTS].isna().any(axis=1)
+    history['signal'] = history['signal'].where(~history['partial'])
+    return history
+
+# --- FINVIZ PARSER (string -> float, cu esecurile raportate explicit) ---
+FINVIZ_SUFFIXES = {'K': 1e3, 'M': 1e6, 'B': 1e9, 'T': 1e12}
+FINVIZ_PLACEHOLDERS = ['', '-']
+
+def parse_finviz_value(raw):
+    """One finviz string ("$1,234.5", "12.3%", "1.2M", "-") -> (value or NaN, missing, failed)."""
+    if raw is None or (isinstance(raw, float) and math.isnan(raw)): return math.nan, True, False
+    v = str(raw).strip()
+    if v in FINVIZ_PLACEHOLDERS: return math.nan, True, False
+    v = v.replace('$', '').replace(',', '').replace('%', '')
+    mult = FINVIZ_SUFFIXES.get(v[-1:].upper())
+    if mult: v = v[:-1]
+    try: value = float(v) * (mult or 1.0)
+    except ValueError: return math.nan, False, True
+    return (value, False, False) if math.isfinite(value) else (math.nan, False, True)
+
+ParsedColumn = collections.namedtuple('ParsedColumn', ['values', 'missing', 'failed'])
+
+def parse_finviz_column(raw):
+    """Parse a whole column of raw finviz strings with pandas string ops (same rules as parse_finviz_value).
+
+    Returns a ParsedColumn of three aligned numpy arrays: `values` (float64,
+    NaN where nothing could be parsed), `missing` (placeholder / empty cells)
+    and `failed` (non-empty cells that are not finite numbers).
+    """
+    s = pd.Series(raw, dtype=object).astype('string').str.strip()
+    missing = (s.isna() | s.isin(FINVIZ_PLACEHOLDERS)).to_numpy(dtype=bool)
 
-def parse_percent(value):
-    try: return float(clean_value(value))
-    except: return 0.0
+    cleaned = s.str.replace(r'[$,%]', '', regex=True)
+    mult = cleaned.str[-1:].str.upper().map(FINVIZ_SUFFIXES).astype('float64')
+    number = cleaned.where(mult.isna(), cleaned.str[:-1])
 
-def analyze_ticker(ticker):
+    values = pd.to_numeric(number, errors='coerce').astype('float64') * mult.fillna(1.0)
+    values = values.to_numpy(dtype='float64', na_value=np.nan, copy=True)
+    values[missing | ~np.isfinite(values)] = np.nan
+    failed = np.isnan(values) & ~missing
+    return ParsedColumn(values, missing, failed)
+
+def parse_finviz_frame(df, columns=None):
+    """Convert the string columns of a multi-ticker fundamentals table to float64.
+
+    Returns the typed frame plus a report {column: [row labels that failed]}.
+    """
+    columns = list(columns) if columns is not None else list(df.columns)
+    typed = df.copy()
+    report = {}
+    for col in columns:
+        parsed = parse_finviz_column(df[col].to_numpy(dtype=object))
+        typed[col] = parsed.values
+        if parsed.failed.any():
+            report[col] = df.index[parsed.failed].tolist()
+    return typed, report
+
+def parse_finviz_fields(fund, defaults):
+    """Parse the fields named in `defaults` from one fundamentals dict.
+
+    Missing keys take their default, placeholders and unparsable values become 0.0.
+    Returns (values dict, list of fields that failed to parse).
+    """
+    values, failures = {}, []
+    for field, default in defaults.items():
+        val, _, failed = parse_finviz_value(fund.get(field, default))
+        values[field] = 0.0 if math.isnan(val) else val
+        if failed: failures.append(field)
+    return values, failures
+
+FUND_NUMERIC_DEFAULTS = {
+    'Price': '0', 'Target Price': '0', 'RSI (14)': '0', 'ATR': '0', 'Recom': '3.0',
+    'Change': '0', 'SMA50': '0', 'SMA200': '0', 'Inst Own': '0', 'Volume': '0'
+}
+
+# --- FINVIZ QUOTE PAGE (extractor lxml dedicat) ---
+# analyze_ticker citeste ~11 campuri din ~80; pagina e parcursa direct cu lxml, fara BeautifulSoup.
+FINVIZ_QUOTE_URL = 'https://finviz.com/quote.ashx?t={ticker}'
+FINVIZ_HEADERS = {'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 '
+                                '(KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36'}
+FINVIZ_FIELDS = list(FUND_NUMERIC_DEFAULTS)
+FINVIZ_MIN_FIELDS = 6          # sub atat -> layout schimbat, trecem pe finvizfinance
+FINVIZ_SESSION = requests.Session()
+FINVIZ_STATS = collections.Counter()
+SNAPSHOT_ROWS = '//table[contains(concat(" ", normalize-space(@class), " "), " snapshot-table2 ")]//tr'
+
+class FinvizLayoutError(ValueError):
+    pass
+
+def extract_finviz_fields(html, fields=None):
+    """Raw snapshot-table values for `fields` plus Industry, as ticker_fundament(raw=True) returns them.
+
+    Raises FinvizLayoutError when the snapshot table is missing or too few fields are found.
+    """
+    fields = set(fields or FINVIZ_FIELDS)
+    tree = lxml.html.fromstring(html)
+    out = {}
+    for row in tree.xpath(SNAPSHOT_ROWS):
+        cells = row.xpath('./td')
+        for label, value in zip(cells[0::2], cells[1::2]):
+            key = label.text_content()
+            if key in fields and key not in out:
+                out[key] = value.text_content()
+        if len(out) == len(fields): break
+    if len(out) < min(FINVIZ_MIN_FIELDS, len(fields)):
+        raise FinvizLayoutError(f"snapshot-table2: {len(out)}/{len(fields)} campuri")
+    industry = tree.xpath('(//div[contains(@class, "quote-links")]//a)[2]/text()') or \
+               tree.xpath('//a[contains(@href, "f=ind_")]/text()')
+    if industry: out['Industry'] = industry[0].strip()
+    return out
+
+def fetch_finviz_page(ticker):
+    response = FINVIZ_SESSION.get(FINVIZ_QUOTE_URL.format(ticker=ticker), headers=FINVIZ_HEADERS, timeout=10)
+    response.raise_for_status()
+    return response.text
+
+def get_finviz_fundament(ticker):
+    """Fields analyze_ticker needs: one page fetch + the lxml extractor, finvizfinance if the layout changed."""
+    html = limited_call('finviz', fetch_finviz_page, ticker)
     try:
-        # 1. Finviz Data
+        fund = extract_finviz_fields(html)
+        FINVIZ_STATS['lean'] += 1
+        return fund
+    except FinvizLayoutError as e:
+        FINVIZ_STATS['fallback'] += 1
+        print(f"Avertisment {ticker}: extractor Finviz ({e}), folosesc finvizfinance")
+        return limited_call('finviz', lambda: finvizfinance(ticker).ticker_fundament())
+
+# --- RUN REPORT (rezumatul rularii, scris in run_report.json) ---
+RUN_REPORT_FILE = 'run_report.json'
+RUN_REPORT = {}
+
+def write_run_report(path=None):
+    """Fill in the live sections (host limits, ...) and write the report next to the outputs."""
+    RUN_REPORT['finished'] = datetime.datetime.now().isoformat(timespec='seconds')
+    RUN_REPORT['hosts'] = {host: limiter.snapshot() for host, limiter in HOST_LIMITERS.items()}
+    RUN_REPORT['finviz_parser'] = dict(FINVIZ_STATS)
+    RUN_REPORT['quarantine'] = quarantine_report()
+    RUN_REPORT['yahoo'] = dict(YAHOO_STATS)
+    save_quarantine()
+    save_yahoo_session()
+    q = RUN_REPORT['quarantine']
+    print(f"Carantina: {sum(len(v) for v in q['symbols'].values())} simboluri, "
+          f"{q['skipped_calls']} apeluri evitate (~{q['time_saved_s']}s)")
+    for host, h in RUN_REPORT['hosts'].items():
+        print(f"Host {host}: limita {h['limit']} (min {h['min_seen']}, max {h['max_seen']}), "
+              f"{h['calls']} cereri, {h['throttled']} throttled, latenta medie {h['latency_ms_ewma']} ms")
+    for name, a in RUN_REPORT.get('artifacts', {}).items():
+        print(f"Artefact {name}: " + (f"{a['bytes_changed']} / {a['bytes']} bytes schimbati" if a['written'] else "neschimbat, nescris"))
+    save_json(path or RUN_REPORT_FILE, RUN_REPORT)
+
+# --- CONCURENTA ADAPTIVA PER HOST (AIMD) ---
+FETCH_WORKERS = 16             # thread-uri pentru process_ticker_list; limita reala e per host
+HOST_LIMITS = {
+    'finviz': {'initial': 3, 'min': 1, 'max': 10},
+    'yahoo': {'initial': 4, 'min': 1, 'max': 16},
+}
+LATENCY_SPIKE = 3.0            # latenta > 3x media recenta = semnal de congestie
+AIMD_BACKOFF = 0.5             # scadere multiplicativa
+THROTTLE_RETRIES = 2
+THROTTLE_SLEEP = 1.0           # secunde, dublat la fiecare reincercare
+
+def is_throttled(exc):
+    """429 / 503, timeouts and the providers' own rate-limit errors count as congestion; a 404 does not."""
+    status = getattr(getattr(exc, 'response', None), 'status_code', None)
+    if status in (429, 503): return True
+    if isinstance(exc, (requests.Timeout, TimeoutError)): return True
+    name, text = type(exc).__name__, str(exc)
+    return 'RateLimit' in name or 'Blocked' in name or '429' in text or 'Too Many Requests' in text
+
+class HostLimiter:
+    """AIMD concurrency limit for one host.
+
+    Every healthy response adds 1/limit (so +1 per round of `limit` calls); a throttle error or
+    a latency spike halves the limit, at most once per average round-trip so that a burst of
+    429s from the same window counts as one congestion signal.
+    """
+    def __init__(self, host, initial=4, min=1, max=16):
+        self.host = host
+        self.min_limit, self.max_limit = min, max
+        self.limit = float(initial)
+        self.inflight = 0
+        self.cond = threading.Condition()
+        self.ewma = None
+        self.last_decrease = 0.0
+        self.stats = collections.Counter()
+        self.min_seen = self.max_seen = int(initial)
+
+    @contextlib.contextmanager
+    def slot(self):
+        with self.cond:
+            while self.inflight >= int(self.limit):
+                self.cond.wait()
+            self.inflight += 1
+        start = time.perf_counter()
         try:
-            stock = finvizfinance(ticker)
-            fund = stock.ticker_fundament()
-        except:
-            fund = {}
+            yield
+        except Exception as e:
+            self.on_error(e)
+            raise
+        else:
+            self.on_success(time.perf_counter() - start)
+        finally:
+            with self.cond:
+                self.inflight -= 1
+                self.cond.notify_all()
+
+    def on_success(self, latency):
+        with self.cond:
+            self.stats['calls'] += 1
+            if self.ewma is not None and latency > LATENCY_SPIKE * self.ewma:
+                self.stats['latency_spikes'] += 1
+                self._decrease()
+            else:
+                self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+            self.ewma = latency if self.ewma is None else 0.8 * self.ewma + 0.2 * latency
+            self._track()
+
+    def on_error(self, exc):
+        with self.cond:
+            self.stats['calls'] += 1
+            if is_throttled(exc):
+                self.stats['throttled'] += 1
+                self._decrease()
+            else:
+                self.stats['errors'] += 1
+            self._track()
+
+    def _decrease(self):
+        now = time.perf_counter()
+        if now - self.last_decrease < (self.ewma or 0): return
+        self.last_decrease = now
+        self.limit = max(self.min_limit, self.limit * AIMD_BACKOFF)
+        self.stats['decreases'] += 1
+
+    def _track(self):
+        self.min_seen = min(self.min_seen, int(self.limit))
+        self.max_seen = max(self.max_seen, int(self.limit))
+        self.cond.notify_all()
+
+    def snapshot(self):
+        with self.cond:
+            return {
+                'limit': int(self.limit), 'min_seen': self.min_seen, 'max_seen': self.max_seen,
+                'calls': self.stats['calls'], 'throttled': self.stats['throttled'], 'errors': self.stats['errors'],
+                'latency_spikes': self.stats['latency_spikes'], 'decreases': self.stats['decreases'],
+                'latency_ms_ewma': round(self.ewma * 1000, 1) if self.ewma is not None else None,
+            }
+
+HOST_LIMITERS = {}
+HOST_LIMITERS_LOCK = threading.Lock()
+
+def host_limiter(host):
+    with HOST_LIMITERS_LOCK:
+        if host not in HOST_LIMITERS:
+            HOST_LIMITERS[host] = HostLimiter(host, **HOST_LIMITS.get(host, {}))
+        return HOST_LIMITERS[host]
+
+def limited_call(host, fn, *args, **kwargs):
+    """Run fn inside a concurrency slot of `host`; throttled calls are retried with exponential sleep."""
+    limiter = host_limiter(host)
+    for attempt in range(THROTTLE_RETRIES + 1):
+        try:
+            with limiter.slot():
+                return fn(*args, **kwargs)
+        except Exception as e:
+            if attempt == THROTTLE_RETRIES or not is_throttled(e): raise
+            time.sleep(THROTTLE_SLEEP * 2 ** attempt)
+
+# --- YAHOO: un handle per simbol + sesiune persistenta intre rulari ---
+YF_CACHE_DIR = os.path.join(CACHE_DIR, 'yfinance')      # cookie-ul A3 (cache-ul yfinance), salvat de actions/cache
+YAHOO_AUTH_FILE = os.path.join(CACHE_DIR, 'yahoo_auth.json')
+CRUMB_MAX_AGE_H = 24
+
+YF_HANDLES = {}                # simbol -> yf.Ticker, o singura instanta per rulare (.info/.calendar raman in cache)
+YF_HANDLES_LOCK = threading.Lock()
+YAHOO_STATS = collections.Counter()
+
+def yf_handle(symbol):
+    """The run's shared yf.Ticker for `symbol`; all handles use yfinance's one session."""
+    with YF_HANDLES_LOCK:
+        handle = YF_HANDLES.get(symbol)
+        if handle is None:
+            handle = YF_HANDLES[symbol] = yf.Ticker(symbol)
+            YAHOO_STATS['handles'] += 1
+        else:
+            YAHOO_STATS['reused'] += 1
+        return handle
+
+def init_yahoo_session():
+    """Point yfinance's cookie cache into CACHE_DIR and reuse the last run's crumb while it is valid.
+
+    The crumb is only reused together with a non-expired cached cookie; if Yahoo rejects it anyway,
+    yfinance renegotiates on the 401. Relies on yfinance internals, so any error means a fresh handshake.
+    """
+    os.makedirs(YF_CACHE_DIR, exist_ok=True)
+    RUN_REPORT['yahoo_auth'] = 'new'
+    try:
+        getattr(yf.cache, 'set_cache_location', yf.set_tz_cache_location)(YF_CACHE_DIR)
+        auth = load_json(YAHOO_AUTH_FILE, {})
+        saved = pd.to_datetime(auth.get('saved'), errors='coerce')
+        if not auth.get('crumb') or pd.isna(saved): return
+        if datetime.datetime.now() - saved > datetime.timedelta(hours=CRUMB_MAX_AGE_H):
+            RUN_REPORT['yahoo_auth'] = 'expired'
+            return
+        data = yf.data.YfData()
+        if data._load_cookie_curlCffi():
+            data._crumb = auth['crumb']
+            RUN_REPORT['yahoo_auth'] = 'reused'
+        else:
+            RUN_REPORT['yahoo_auth'] = 'cookie expired'
+    except Exception as e:
+        print(f"Sesiune Yahoo: pornesc de la zero ({e})")
 
-        # 2. YFinance Data
-        sparkline_svg = ""
+def save_yahoo_session():
+    try:
+        crumb = yf.data.YfData()._crumb
+    except Exception:
+        return
+    if crumb and '<html>' not in crumb:
+        save_json(YAHOO_AUTH_FILE, {'crumb': crumb, 'saved': datetime.datetime.now().isoformat(timespec='seconds')})
+
+# --- CARANTINA (cache negativ per simbol / provider) ---
+QUARANTINE_FILE = os.path.join(CACHE_DIR, 'quarantine.json')
+QUARANTINE_AFTER = 2           # esecuri consecutive pana la carantina (unul singur poate fi tranzitoriu)
+QUARANTINE_BASE_H = 2          # prima re-verificare dupa 2h, apoi 4h, 8h, ...
+QUARANTINE_MAX_H = 24 * 7
+
+QUARANTINE = None              # {provider: {symbol: entry}}, incarcat la prima folosire
+QUARANTINE_LOCK = threading.Lock()
+QUARANTINE_TOUCHED = set()     # (provider, symbol) modificate in rularea curenta
+QUARANTINE_FAILED = set()      # (provider, symbol) care au esuat deja in rularea curenta
+QUARANTINE_STATS = collections.Counter()
+
+class Quarantined(Exception):
+    pass
+
+def quarantine_state():
+    global QUARANTINE
+    if QUARANTINE is None:
+        QUARANTINE = load_json(QUARANTINE_FILE, {})
+    return QUARANTINE
+
+def is_quarantined(provider, symbol, now=None):
+    with QUARANTINE_LOCK:
+        entry = quarantine_state().get(provider, {}).get(symbol)
+    if not entry or entry['failures'] < QUARANTINE_AFTER: return False
+    return (now or datetime.datetime.now()).isoformat(timespec='seconds') < entry['next_probe']
+
+def record_failure(provider, symbol, error, seconds):
+    """Count a failure (once per run); from QUARANTINE_AFTER on, the next probe moves out exponentially."""
+    now = datetime.datetime.now()
+    with QUARANTINE_LOCK:
+        if (provider, symbol) in QUARANTINE_FAILED: return
+        QUARANTINE_FAILED.add((provider, symbol))
+        entry = quarantine_state().setdefault(provider, {}).setdefault(
+            symbol, {'failures': 0, 'first': now.isoformat(timespec='seconds'), 'cost_s': seconds})
+        entry['failures'] += 1
+        entry['last'] = now.isoformat(timespec='seconds')
+        entry['error'] = str(error)[:200]
+        entry['cost_s'] = round(0.5 * entry['cost_s'] + 0.5 * seconds, 3)
+        hours = min(QUARANTINE_MAX_H, QUARANTINE_BASE_H * 2 ** max(0, entry['failures'] - QUARANTINE_AFTER))
+        entry['next_probe'] = (now + datetime.timedelta(hours=hours)).isoformat(timespec='seconds')
+        QUARANTINE_TOUCHED.add((provider, symbol))
+
+def record_success(provider, symbol):
+    with QUARANTINE_LOCK:
+        if quarantine_state().get(provider, {}).pop(symbol, None) is not None:
+            QUARANTINE_STATS['released'] += 1
+            QUARANTINE_TOUCHED.add((provider, symbol))
+
+def note_skip(provider, symbol):
+    """Count a call not made, and the time its last failures cost."""
+    with QUARANTINE_LOCK:
+        QUARANTINE_STATS['skipped'] += 1
+        QUARANTINE_STATS['saved_ms'] += int(quarantine_state()[provider][symbol]['cost_s'] * 1000)
+
+def guarded_call(provider, symbol, fn):
+    """Skip symbols quarantined for `provider`; otherwise run fn and record the outcome.
+
+    Throttling is the limiter's business (AIMD), so 429s and timeouts do not count as failures.
+    """
+    if is_quarantined(provider, symbol):
+        note_skip(provider, symbol)
+        raise Quarantined(f"{provider}:{symbol}")
+    start = time.perf_counter()
+    try:
+        result = fn()
+    except Exception as e:
+        if not is_throttled(e):
+            record_failure(provider, symbol, e, time.perf_counter() - start)
+        raise
+    record_success(provider, symbol)
+    return result
+
+def skip_quarantined(symbols, providers=('finviz', 'yahoo')):
+    """Symbols quarantined at every provider (nothing to fetch for them this run)."""
+    dead = [s for s in symbols if all(is_quarantined(p, s) for p in providers)]
+    for s in dead:
+        for p in providers: note_skip(p, s)
+    return dead
+
+@contextlib.contextmanager
+def file_lock(path):
+    """Exclusive flock on `path`.lock, held across processes (--workers shards) for a read-merge-write."""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(f"{path}.lock", 'a') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
         try:
-            yf_ticker = yf.Ticker(ticker)
-            yf_info = yf_ticker.info
-            company_name = yf_info.get('longName', ticker)
-            analysts_count = yf_info.get('numberOfAnalystOpinions', 0)
-            sector = yf_info.get('sector', 'Unknown')
-            
-            hist = yf_ticker.history(period="1mo")
-            if not hist.empty:
-                closes = hist['Close'].tolist()
-                color = "#4caf50" if closes[-1] >= closes[0] else "#f44336"
-                sparkline_svg = generate_sparkline(closes, color=color, width=100, height=30)
-                
-                atr_val = fund.get('ATR')
-                if not atr_val or atr_val == '-' or atr_val == '0':
-                    high_low = (hist['High'] - hist['Low']).mean()
-                    fund['ATR'] = str(round(high_low, 2))
-                    if fund.get('Price', '0') == '0':
-                         fund['Price'] = str(round(closes[-1], 2))
-        except:
-            company_name = ticker
-            analysts_count = 0
-            sector = 'Unknown'
-            
-        # 3. Parsing Values
-        price = parse_float(fund.get('Price', '0'))
-        if price == 0: 
-            try: price = yf_info.get('regularMarketPrice', 0)
-            except: pass
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+def save_quarantine(path=None):
+    """Write this run's changes on top of the file.
+
+    Shards running in parallel each touch their own symbols; the file lock keeps one shard's
+    read-merge-write from dropping another's, and save_json replaces the file atomically.
+    """
+    path = path or QUARANTINE_FILE
+    with QUARANTINE_LOCK:
+        if QUARANTINE is None or not QUARANTINE_TOUCHED: return
+        with file_lock(path):
+            on_disk = load_json(path, {})
+            for provider, symbol in QUARANTINE_TOUCHED:
+                entry = QUARANTINE.get(provider, {}).get(symbol)
+                if entry is None: on_disk.get(provider, {}).pop(symbol, None)
+                else: on_disk.setdefault(provider, {})[symbol] = entry
+            save_json(path, on_disk)
+        QUARANTINE_TOUCHED.clear()
+
+def quarantine_report(now=None):
+    now = (now or datetime.datetime.now()).isoformat(timespec='seconds')
+    state = quarantine_state()
+    return {
+        'skipped_calls': QUARANTINE_STATS['skipped'],
+        'time_saved_s': round(QUARANTINE_STATS['saved_ms'] / 1000, 1),
+        'released': QUARANTINE_STATS['released'],
+        'symbols': {provider: {s: {k: e[k] for k in ('failures', 'next_probe', 'error')}
+                               for s, e in sorted(entries.items())
+                               if e['failures'] >= QUARANTINE_AFTER and now < e['next_probe']}
+                    for provider, entries in state.items()},
+    }
+
+def fetch_yahoo_info(yf_ticker):
+    info = limited_call('yahoo', lambda: yf_ticker.info)
+    # simbol delistat / necunoscut: yfinance intoarce un dict aproape gol in loc de eroare
+    if not info or not (info.get('longName') or info.get('shortName') or info.get('regularMarketPrice')):
+        raise LookupError("Yahoo: simbol fara date")
+    return info
+
+def fetch_ticker(ticker):
+    """Network half of analyze_ticker: raw finviz strings plus the yfinance fields, nothing parsed yet."""
+    # 1. Finviz Data
+    try:
+        fund = guarded_call('finviz', ticker, lambda: get_finviz_fundament(ticker))
+    except:
+        fund = {}
+
+    # 2. YFinance Data
+    raw = {'Ticker': ticker, 'fund': fund, 'yf_info': {}, 'Company_Name': ticker, 'Analysts': 0,
+           'Sector': 'Unknown', 'Earnings': '', 'Spark': np.empty(0, dtype=np.float32)}
+    try:
+        yf_ticker = yf_handle(ticker)
+        yf_info = guarded_call('yahoo', ticker, lambda: fetch_yahoo_info(yf_ticker))
+        raw.update(yf_info=yf_info, Company_Name=yf_info.get('longName', ticker),
+                   Analysts=yf_info.get('numberOfAnalystOpinions', 0), Sector=yf_info.get('sector', 'Unknown'))
+        earn_ts = yf_info.get('earningsTimestampStart') or yf_info.get('earningsTimestamp')
+        if earn_ts: raw['Earnings'] = datetime.date.fromtimestamp(earn_ts).isoformat()
+
+        hist = get_price_history(ticker, yf_ticker)
+        if not hist.empty:
+            closes = hist['Close'].tolist()
+            raw['Spark'] = np.asarray(closes, dtype=np.float32)
+
+            atr_val = fund.get('ATR')
+            if not atr_val or atr_val == '-' or atr_val == '0':
+                high_low = (hist['High'] - hist['Low']).mean()
+                fund['ATR'] = str(round(high_low, 2))
+                if fund.get('Price', '0') == '0':
+                     fund['Price'] = str(round(closes[-1], 2))
+    except:
+        pass
+    return raw
+
+def analyze_ticker(ticker):
+    """One symbol end to end (fetch, parse, score); process_ticker_list batches the parse step instead."""
+    try:
+        raw = fetch_ticker(ticker)
+        nums, bad_fields = parse_finviz_fields(raw['fund'], FUND_NUMERIC_DEFAULTS)
+        if bad_fields:
+            print(f"Avertisment {ticker}: valori nenumerice Finviz {bad_fields}")
+        return score_ticker(raw, nums)
+    except Exception as e:
+        print(f"Eroare {ticker}: {e}")
+        return None
+
+def score_ticker(raw, nums):
+    """Trend / consensus / decision for one symbol from its fetched fields and parsed finviz numbers."""
+    try:
+        ticker, fund, yf_info = raw['Ticker'], raw['fund'], raw['yf_info']
+        company_name, analysts_count, sector = raw['Company_Name'], raw['Analysts'], raw['Sector']
+
+        price = nums['Price']
+        if price == 0: price = yf_info.get('regularMarketPrice', 0)
             
-        target = parse_float(fund.get('Target Price', '0'))
-        rsi = parse_float(fund.get('RSI (14)', '0'))
-        atr = parse_float(fund.get('ATR', '0'))
-        recom = parse_float(fund.get('Recom', '3.0'))
-        change_pct = parse_percent(fund.get('Change', '0'))
+        target = nums['Target Price']
+        rsi = nums['RSI (14)']
+        atr = nums['ATR']
+        recom = nums['Recom']
+        change_pct = nums['Change']
         
-        sma50_chg = parse_percent(fund.get('SMA50', '0'))
-        sma200_chg = parse_percent(fund.get('SMA200', '0'))
+        sma50_chg = nums['SMA50']
+        sma200_chg = nums['SMA200']
         
         sma50 = round(price / (1 + sma50_chg/100), 2) if sma50_chg != -100 else 0
         sma200 = round(price / (1 + sma200_chg/100), 2) if sma200_chg != -100 else 0
@@ -349,23 +1365,13 @@ def analyze_ticker(ticker):
         theme = sector 
 
         # Inst Own
-        inst_own = parse_percent(fund.get('Inst Own', '0'))
+        inst_own = nums['Inst Own']
         if inst_own == 0:
             try: inst_own = round(yf_info.get('heldPercentInstitutions', 0) * 100, 2)
             except: pass
 
         # --- NEW METRICS (Volume, R:R) ---
-        vol_str = fund.get('Volume', '0')
-        def parse_volume(v):
-            if not v or v == '-': return 0
-            v = str(v).replace(',', '')
-            mult = 1
-            if v.endswith('M'): mult = 1_000_000; v = v[:-1]
-            elif v.endswith('B'): mult = 1_000_000_000; v = v[:-1]
-            elif v.endswith('K'): mult = 1_000; v = v[:-1]
-            try: return float(v) * mult
-            except: return 0
-        volume = parse_volume(vol_str)
+        volume = nums['Volume']
         
         # Risk / Reward
         risk = price - stop_loss
@@ -422,7 +1428,7 @@ def analyze_ticker(ticker):
             'Ticker': ticker,
             'Company_Name': company_name,
             'Price': price,
-            'Grafic': sparkline_svg,
+            'Spark': raw['Spark'],
             'Target': target,
             'To Target %': to_target,
             'Consensus': market_consensus,
@@ -443,14 +1449,468 @@ def analyze_ticker(ticker):
             'Momentum_Score': mom_score,
             'Watchlist_Score': wl_score,
             'Industry': industry,
-            'Theme': theme
+            'Theme': theme,
+            'Earnings': raw['Earnings'],
+            'Fetched': datetime.datetime.now().isoformat(timespec='seconds'),
         }
     except Exception as e:
         print(f"Eroare {ticker}: {e}")
         return None
 
+# --- RESULT SCHEMA (typed, compact) ---
+TREND_LEVELS = ['Strong Bullish', 'Bullish Pullback', 'Neutral', 'Bearish Bounce', 'Bearish']
+RSI_STATUS_LEVELS = ['Oversold', 'Neutral', 'Overbought']
+CONSENSUS_LEVELS = ['Strong Buy', 'Buy', 'Hold', 'Sell', 'Strong Sell']
+DECISION_LEVELS = ['BUY', 'WATCH', 'WAIT', 'HOLD/ADD', 'AVOID', 'NO DATA']
+
+# Coloana -> dtype. Listele sunt categorii fixe, 'category' = categorii deduse din date.
+# Preturile raman float64 (afisate exact cu 2 zecimale), indicatorii merg pe float32.
+RESULT_SCHEMA = {
+    'Price': 'float64', 'Sug. Buy': 'float64', 'Target': 'float64', 'Stop Loss': 'float64',
+    'SMA 50': 'float64', 'SMA 200': 'float64', 'Volume': 'float64',
+    'To Target %': 'float32', 'Inst Own': 'float32', 'RSI': 'float32', 'ATR': 'float32',
+    'Change %': 'float32', 'R:R': 'float32', 'Target Prob %': 'float32', 'Hold Days': 'float32', 'P/C': 'float32',
+    'Analysts': 'int16', 'Momentum_Score': 'int8', 'Watchlist_Score': 'int8',
+    'Trend': TREND_LEVELS, 'RSI Status': RSI_STATUS_LEVELS,
+    'Consensus': CONSENSUS_LEVELS, 'Decision': DECISION_LEVELS,
+    'Industry': 'category', 'Theme': 'category',
+}
+
+def apply_result_schema(df):
+    """Cast a scan result frame to RESULT_SCHEMA (categoricals + narrow numeric dtypes)."""
+    df = df.copy()
+    for col, dtype in RESULT_SCHEMA.items():
+        if col not in df.columns: continue
+        if isinstance(dtype, list):
+            df[col] = pd.Categorical(df[col], categories=dtype)
+        elif dtype == 'category':
+            df[col] = df[col].astype('category')
+        else:
+            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).astype(dtype)
+    if 'Spark' in df.columns:
+        df['Spark'] = [np.asarray(v, dtype=np.float32) for v in df['Spark']]
+    return df
+
+def to_result_frame(results):
+    return apply_result_schema(pd.DataFrame(results))
+
+def display_frame(df):
+    """float32 columns -> float64 rounded to 2 decimals, so the HTML shows 45.67 not 45.66999816894531."""
+    narrow = [c for c, dtype in RESULT_SCHEMA.items() if dtype == 'float32' and c in df.columns]
+    out = df.copy()
+    out[narrow] = out[narrow].astype('float64').round(2)
+    return out
+
+# --- RENDER CACHE (fragmente HTML refolosite intre rulari) ---
+RENDER_CACHE_FILE = os.path.join(CACHE_DIR, 'render_cache.jsonl')
+RENDER_CACHE_MAX = 50000       # fragmente pastrate; cele nefolosite in rularea curenta sunt eliminate
+# Spark intra separat in hash; varsta, probabilitatile si P/C se randeaza in afara fragmentului
+ROW_KEY_EXCLUDE = ['Spark', 'Fetched', 'Changed', 'Carried', 'List', 'Target Prob %', 'Hold Days', 'P/C']
+
+def code_version(*funcs):
+    """Checksum of the functions' bytecode + constants: cached fragments expire when a template changes."""
+    return f"{zlib.crc32(b''.join(marshal.dumps(f.__code__) for f in funcs)):08x}"
+
+class RenderCache:
+    """Rendered fragments keyed by a hash of their inputs, persisted between runs.
+
+    The file is JSON lines ([key, html], plus one {"render_ms": ...} line at the end). Only an
+    index key -> byte offset stays in memory; hits are read back with a seek. Fragments used in
+    this run are appended to a new file as they are rendered, so rows of removed tickers (and the
+    old version of every changed row) drop out and memory does not grow with the row count.
+    At most RENDER_CACHE_MAX fragments are written.
+    """
+    def __init__(self, path=None, max_entries=RENDER_CACHE_MAX, persist=True):
+        self.path = path or RENDER_CACHE_FILE
+        self.max_entries = max_entries
+        self.persist = persist
+        self.render_ms = {}            # cost mediu per tip de fragment, din rularile trecute
+        self.index, self.new_index = {}, {}
+        self.stats = collections.Counter()
+        self.miss_s = collections.Counter()
+        self.old = self.out = None
+        try:
+            self.old = open(self.path, 'rb')
+        except OSError:
+            return
+        offset = 0
+        for line in self.old:
+            if line.startswith(b'['):
+                self.index[line[2:line.index(b'"', 2)].decode()] = offset
+            elif line.startswith(b'{'):
+                with contextlib.suppress(ValueError):
+                    self.render_ms = json.loads(line).get('render_ms', {})
+            offset += len(line)
+
+    @staticmethod
+    def _read(f, offset):
+        f.seek(offset)
+        return json.loads(f.readline())[1]
+
+    def _write(self, key, html):
+        if not self.persist or len(self.new_index) >= self.max_entries: return
+        if self.out is None:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            self.out = open(f"{self.path}.tmp", 'w+b')
+        self.new_index[key] = self.out.tell()
+        self.out.write(json.dumps([key, html]).encode() + b'\n')
+
+    def get(self, key, render):
+        kind = key.split(':', 1)[0]
+        html = None
+        if key in self.new_index:
+            self.out.flush()
+            html = self._read(self.out, self.new_index[key])
+            self.out.seek(0, os.SEEK_END)
+        elif key in self.index:
+            html = self._read(self.old, self.index[key])
+        if html is not None:
+            self.stats[f"{kind}_hits"] += 1
+        else:
+            start = time.perf_counter()
+            html = render()
+            self.miss_s[kind] += time.perf_counter() - start
+            self.stats[f"{kind}_misses"] += 1
+        if key not in self.new_index: self._write(key, html)
+        return html
+
+    def report(self):
+        hits = sum(v for k, v in self.stats.items() if k.endswith('_hits'))
+        total = hits + sum(v for k, v in self.stats.items() if k.endswith('_misses'))
+        for kind, seconds in self.miss_s.items():
+            self.render_ms[kind] = round(seconds * 1000 / self.stats[f"{kind}_misses"], 4)
+        saved_ms = sum(self.stats[f"{kind}_hits"] * ms for kind, ms in self.render_ms.items())
+        return {'hits': hits, 'lookups': total, 'hit_ratio': round(hits / total, 3) if total else 0.0,
+                'saved_ms': round(saved_ms, 1), 'entries': len(self.new_index),
+                'evicted': len(set(self.index) - set(self.new_index)), **dict(self.stats)}
+
+    def save(self):
+        if self.old is not None: self.old.close()
+        if self.out is None: return
+        self.out.write(json.dumps({'render_ms': self.render_ms}).encode() + b'\n')
+        self.out.close()
+        os.replace(f"{self.path}.tmp", self.path)
+
+RENDER_CACHE = None
+
+def render_cache():
+    global RENDER_CACHE
+    if RENDER_CACHE is None:
+        RENDER_CACHE = RenderCache()
+    return RENDER_CACHE
+
+def finish_render_cache():
+    """Report and persist the cache at the end of a render pass (no-op if nothing was rendered)."""
+    global RENDER_CACHE
+    if RENDER_CACHE is None: return
+    RUN_REPORT['render_cache'] = RENDER_CACHE.report()
+    RENDER_CACHE.save()
+    RENDER_CACHE = None
+
+def row_keys(view):
+    """One cache key per display row: ticker + 64-bit hash of the displayed values + crc of the spark."""
+    cols = [c for c in view.columns if c not in ROW_KEY_EXCLUDE]
+    hashes = pd.util.hash_pandas_object(view[cols], index=False).to_numpy()
+    sparks = [zlib.crc32(np.asarray(v, dtype=np.float32).tobytes()) for v in view['Spark']]
+    version = code_version(render_row, generate_sparkline)
+    return [f"row:{t}:{h:016x}{c:08x}:{version}" for t, h, c in zip(view['Ticker'], hashes, sparks)]
+
+def cached_sparkline(data_list, color="#4caf50", width=120, height=40):
+    values = np.asarray(data_list, dtype=np.float64)
+    key = f"spark:{zlib.crc32(values.tobytes()):08x}:{len(values)}:{color}:{width}x{height}:{code_version(generate_sparkline)}"
+    return render_cache().get(key, lambda: generate_sparkline(list(data_list), color=color, width=width, height=height))
+
 # --- HTML GENERATOR ---
-def generate_html(df_main, df_custom, cortex_data, verdict_data):
+TABLE_HEADER = """<tr>
+                                    <th>Ticker</th>
+                                    <th>Company</th>
+                                    <th>Price</th>
+                                    <th style="width:100px;">Grafic</th>
+                                    <th title="Price limit for safe entry based on technical support levels.">Sug. Buy ⓘ</th>
+                                    <th title="Analyst price target consensus.">Target</th>
+                                    <th title="Potential upside to analyst target.">To Target %</th>
+                                    <th title="Average analyst rating (Strong Buy to Sell).">Consensus ⓘ</th>
+                                    <th>Analysts</th>
+                                    <th>Inst %</th>
+                                    <th title="Current technical trend based on SMA50/SMA200 interaction.">Trend ⓘ</th>
+                                    <th title="Relative Strength Index. >70 Overbought, <30 Oversold.">RSI ⓘ</th>
+                                    <th>RSI Status</th>
+                                    <th title="Average True Range. Volatility metric used for stop losses.">ATR</th>
+                                    <th title="Suggested stop loss level (2x ATR below price).">Stop Loss ⓘ</th>
+                                    <th>SMA 50</th>
+                                    <th>SMA 200</th>
+                                    <th title="Daily percentage change. High +% = Momentum.">Change % ⓘ</th>
+                                    <th title="Composite score (0-100) based on Price vs SMAs, RSI, and recent perf.">Mom. Score ⓘ</th>
+                                    <th>WL Score</th>
+                                    <th>Industry</th>
+                                    <th>Theme</th>
+                                    <th title="System logic: BUY if Price < Sug Buy. WATCH if within 5%.">Decizie ⓘ</th>
+                                    <th title="Daily Trading Volume.">Volume</th>
+                                    <th title="Risk/Reward Ratio. Potential reward vs risk to Stop Loss. >2.0 is good.">R:R ⓘ</th>
+                                    <th title="Time since this row's values last changed. Low-priority tickers are refreshed less often.">Updated ⓘ</th>
+                                    <th title="Monte Carlo probability that price reaches Target before Stop Loss (no drift, daily volatility from price history or ATR).">P(Target) ⓘ</th>
+                                    <th title="Expected trading days until Target or Stop Loss is hit, capped at 126.">Hold Days ⓘ</th>
+                                    <th title="Put/Call volume ratio over the nearest option expiries (open interest when there is no volume yet).">P/C ⓘ</th>
+                                </tr>"""
+
+ROW_CHUNK = 1000
+
+def row_age(fetched):
+    """(epoch seconds, fallback label) for a Changed / Fetched timestamp; unknown rows get (0, "-").
+
+    The relative age ("5m", "3h", "2z") is computed in the browser by AGE_SCRIPT, so the
+    published page does not change just because time passed.
+    """
+    try:
+        ts = datetime.datetime.fromisoformat(fetched)
+    except (TypeError, ValueError):
+        return 0, "-"
+    return int(ts.timestamp()), ts.strftime('%m-%d %H:%M')
+
+CARRIED_TITLE = "Nedescarcat in rularea asta: randul e reluat din scanarea anterioara, Price / Change % sunt de la ora descarcarii"
+
+AGE_SCRIPT = """<script>
+        document.querySelectorAll('td.row-age[data-ts]').forEach(function (td) {
+            var m = Math.max(0, Math.floor((Date.now() / 1000 - td.dataset.ts) / 60));
+            var carried = td.classList.contains('row-carried');
+            td.textContent = (carried ? '\u21bb ' : '') + (m < 60 ? m + 'm' : m < 1440 ? Math.floor(m / 60) + 'h' : Math.floor(m / 1440) + 'z');
+            td.className = 'small row-age ' + (carried ? 'row-carried ' : '') + (m < 120 ? 'text-muted' : m < 1440 ? 'text-warning' : 'text-danger');
+        });
+    </script>"""
+
+def render_row(row):
+    """One scan row as HTML, without the age cell and the closing </tr> (those change every run)."""
+    trend_color = "text-warning"
+    if "Strong Bullish" in row['Trend']: trend_color = "text-success"
+    elif "Bearish" in row['Trend']: trend_color = "text-danger"
+
+    target_color = "text-success" if float(row['To Target %']) > 0 else "text-danger"
+    mom_color = "text-success" if float(row['Momentum_Score']) >= 70 else "text-warning"
+    wl_color = "text-success" if float(row['Watchlist_Score']) >= 70 else "text-muted"
+
+    rsi_val = float(row['RSI'])
+    rsi_color = "text-danger" if rsi_val > 70 or rsi_val < 30 else "text-muted"
+
+    decision = row.get('Decision', 'WAIT')
+    dec_color = "text-success" if decision == "BUY" else "text-warning" if decision == "WATCH" else "text-muted"
+    status = row.get('Data_Status')
+    dec_title = f' title="Date invalide: {status}"' if isinstance(status, str) and status else ""
+
+    vol = row.get('Volume', 0)
+    vol_display = f"{vol/1000000:.1f}M" if vol > 1000000 else f"{vol/1000:.0f}K"
+
+    spark = row['Spark']
+    spark_color = "#4caf50" if len(spark) and spark[-1] >= spark[0] else "#f44336"
+    grafic = generate_sparkline(spark.tolist(), color=spark_color, width=100, height=30)
+
+    return f"""
+            <tr>
+                <td class="fw-bold"><a href="https://finviz.com/quote.ashx?t={row['Ticker']}" target="_blank" class="text-white text-decoration-none">{row['Ticker']}</a></td>
+                <td class="small text-muted">{str(row['Company_Name'])[:15]}..</td>
+                <td>${row['Price']}</td>
+                <td><div style="width:100px; overflow:hidden;" data-spark="{row.get('Spark_TF', '')}" data-spark-trend>{grafic}</div></td> 
+                <td class="text-warning fw-bold">${row['Sug. Buy']}</td>
+                <td>${row['Target']}</td>
+                <td class="{target_color}">{row['To Target %']}%</td>
+                <td>{row['Consensus']}</td>
+                <td>{row['Analysts']}</td>
+                <td>{row['Inst Own']}%</td>
+                <td class="{trend_color}">{row['Trend']}</td>
+                <td class="{rsi_color}">{row['RSI']}</td>
+                <td class="small">{row['RSI Status']}</td>
+                <td>{row['ATR']}</td>
+                <td class="text-danger">${row['Stop Loss']}</td>
+                <td>${row['SMA 50']}</td>
+                <td>${row['SMA 200']}</td>
+                <td class="{ 'text-success' if float(row['Change %']) > 0 else 'text-danger' }">{row['Change %']}%</td>
+                <td class="{mom_color} fw-bold">{row['Momentum_Score']}</td>
+                <td class="{wl_color} fw-bold">{row['Watchlist_Score']}</td>
+                <td class="small">{row['Industry']}</td>
+                <td class="small">{row['Theme']}</td>
+                <td class="{dec_color} fw-bold"{dec_title}>{decision}</td>
+                <td>{vol_display}</td>
+                <td>{row.get('R:R', 0)}</td>"""
+
+def render_odds(prob, days):
+    """P(Target) and Hold Days cells; '-' when the row has no usable Target/Stop (Hold Days 0)."""
+    if not days > 0:
+        return """
+                <td class="text-muted" data-order="-1">-</td>
+                <td class="text-muted" data-order="999">-</td>"""
+    color = "text-success" if prob >= 50 else "text-warning" if prob >= 30 else "text-muted"
+    return f"""
+                <td class="{color}">{prob:.1f}%</td>
+                <td>{days:.0f}</td>"""
+
+def render_putcall(pc):
+    if not pc > 0:
+        return """
+                <td class="text-muted" data-order="-1">-</td>"""
+    color = "text-danger" if pc > 1.0 else "text-success" if pc < 0.6 else "text-muted"
+    return f"""
+                <td class="{color}">{pc:.2f}</td>"""
+
+def iter_rows(df):
+    """Yield one <tr> per scan row; works through the frame in chunks so memory stays flat.
+
+    Row bodies come from the render cache when the row's display inputs did not change.
+    """
+    if df is None or df.empty: return
+    cache = render_cache()
+    for start in range(0, len(df), ROW_CHUNK):
+        view = display_frame(df.iloc[start:start + ROW_CHUNK])
+        view['Spark_TF'] = encode_sparks(spark_closes(OHLC_PANEL, view['Ticker'].tolist(), view['Spark'].tolist()))
+        stamp = 'Changed' if 'Changed' in view else 'Fetched'
+        fetched = view[stamp].tolist() if stamp in view else [None] * len(view)
+        carried = view['Carried'].fillna(False).astype(bool).tolist() if 'Carried' in view else [False] * len(view)
+        # randurile reluate arata cand au fost descarcate: Price / Change % sunt de atunci
+        if carried and 'Fetched' in view:
+            fetched = [f if c else s for c, f, s in zip(carried, view['Fetched'].tolist(), fetched)]
+        probs, days, pcs = (view[c].tolist() if c in view else [0] * len(view) for c in ('Target Prob %', 'Hold Days', 'P/C'))
+        for k, key in enumerate(row_keys(view)):
+            body = cache.get(key, lambda: render_row(view.iloc[k]))
+            epoch, label = row_age(fetched[k])
+            ts_attr = f' data-ts="{epoch}"' if epoch else ""
+            if carried[k]:
+                ts_attr += f' title="{CARRIED_TITLE}"'
+                label = f"↻ {label}"
+            yield f"""{body}
+                <td class="small row-age{' row-carried' if carried[k] else ''} text-muted" data-order="{epoch}"{ts_attr}>{label}</td>{render_odds(probs[k], days[k])}{render_putcall(pcs[k])}
+            </tr>"""
+
+def build_rows(df):
+    return "".join(iter_rows(df))
+
+# --- ARTEFACTE PUBLICATE (deterministe, scrise doar la schimbare) ---
+ARTIFACT_VOLATILE = re.compile(rb'<span class="generated-at">[^<]*</span>')  # ignorat la comparare
+
+def mask_volatile(line):
+    return ARTIFACT_VOLATILE.sub(b'', line) if b'generated-at' in line else line
+
+def compare_artifact(new_path, old_path):
+    """(same, bytes, bytes_changed) for two files, read line by line side by side.
+
+    Only the line carrying the "Updated" stamp is masked. bytes_changed counts the bytes of new lines
+    that differ from the old line at the same position, so memory stays at one line per file
+    whatever the row count (an inserted row shifts everything after it and counts as changed).
+    """
+    same, size, changed = True, 0, 0
+    with open(new_path, 'rb') as new, open(old_path, 'rb') as old:
+        for a, b in itertools.zip_longest(new, old):
+            if a is None:
+                same = False
+                break
+            size += len(a)
+            if b is None or mask_volatile(a) != mask_volatile(b):
+                same = False
+                changed += len(a)
+    return same, size, changed
+
+def commit_artifact(tmp, path):
+    """Move a freshly written `tmp` over `path` only if the content changed.
+
+    The "Updated" stamp is masked out of the comparison, so a rerun on the same data leaves the
+    file (and its mtime, ETag and git diff) alone. Result goes to RUN_REPORT['artifacts'].
+    """
+    if os.path.exists(path):
+        unchanged, size, changed = compare_artifact(tmp, path)
+    else:
+        unchanged, size = False, os.path.getsize(tmp)
+        changed = size
+    if unchanged:
+        os.remove(tmp)
+    else:
+        os.replace(tmp, path)
+    RUN_REPORT.setdefault('artifacts', {})[path] = {'written': not unchanged, 'bytes': size, 'bytes_changed': changed}
+
+def write_html_stream(path, sections):
+    """Write the page section by section to a temp file, then publish it with commit_artifact.
+
+    os.replace is atomic, so the published file is either the old page or the new one, never half-written.
+    """
+    tmp = f"{path}.tmp"
+    try:
+        with open(tmp, 'w') as f:
+            for section in sections:
+                for chunk in section:
+                    f.write(chunk)
+        commit_artifact(tmp, path)
+    finally:
+        if os.path.exists(tmp): os.remove(tmp)
+
+def render_verdict_timeline(history, bars=120, changes=8):
+    """Score sparkline over the last `bars` complete rows plus the most recent signal flips (partial rows skipped)."""
+    if history is None or history.empty: return ""
+    if 'partial' in history: history = history[~history['partial']]
+    tail = history.iloc[-bars:]
+    spark = generate_sparkline(tail['score'].tolist(), color="#4caf50", width=360, height=50)
+    if not spark:
+        spark = '<div class="small text-muted">Istoric incomplet: breadth (SMA200%, Highs-Lows) se salveaza zilnic de acum.</div>'
+
+    sig = history['signal']
+    flips = history[sig.ne(sig.shift()) & sig.shift().notna()].iloc[-changes:]
+    prev_sig = sig.shift().loc[flips.index]
+    colors = {"BUY": "text-success", "SELL": "text-danger", "HOLD": "text-warning"}
+    rows = "".join(
+        f'<tr><td>{d.strftime("%Y-%m-%d")}</td><td>{p} → <span class="{colors.get(f, "")} fw-bold">{f}</span></td><td>{sc}/100</td></tr>'
+        for d, p, f, sc in zip(flips.index[::-1], prev_sig[::-1], flips['signal'][::-1], flips['score'][::-1]))
+    if not rows:
+        rows = '<tr><td colspan="3" class="text-muted text-center">Niciun semnal schimbat în istoric.</td></tr>'
+    return f"""
+                    <div class="card bg-dark border-secondary mb-4 p-3">
+                        <div class="row align-items-center">
+                            <div class="col-md-6 text-center">
+                                <div class="small text-muted mb-2">Istoric Scor Verdict (ultimele {len(tail)} zile)</div>
+                                {spark}
+                            </div>
+                            <div class="col-md-6">
+                                <table class="table table-dark table-sm mb-0">
+                                    <thead><tr><th>Data</th><th>Semnal</th><th>Scor</th></tr></thead>
+                                    <tbody>{rows}</tbody>
+                                </table>
+                            </div>
+                        </div>
+                    </div>"""
+
+def render_index_card(name, data, exp):
+    """One cortex index-card."""
+    val = data.get('value', 'N/A')
+    chg = data.get('change', 0)
+    status = data.get('status', 'N/A')
+    spark = data.get('sparkline', '')
+    spark_attr = f' data-spark="{data["spark_tf"]}"' if data.get('spark_tf') else ""
+    
+    threshold_display = ""
+    if name in ['VIX', 'VIX3M']: threshold_display = "15 NORMAL 20"
+    elif name == 'VXN': threshold_display = "20 NORMAL 30"
+    elif name == 'SKEW': threshold_display = "130 NORMAL 145"
+    elif name == 'MOVE': threshold_display = "80 NORMAL 120"
+    elif name == 'CRYPTO FEAR': threshold_display = "25 NEUTRAL 75"
+    elif name == 'Put/Call Ratio': threshold_display = "0.7 NORMAL 1.0"
+    
+    chg_sign = "+" if isinstance(chg, (int, float)) and chg > 0 else ""
+    chg_str = f"{chg_sign}{chg}" if isinstance(chg, (int, float)) else "-"
+    
+    tooltip_content = f"{exp['desc']}\\n\\n{exp['thresholds']}"
+    pct_1y = data.get('pct_1y')
+    pct_html = f'<div class="index-threshold">1Y pct: {pct_1y}%</div>' if pct_1y is not None else ""
+    
+    return f"""
+            <div class="index-card" title="{tooltip_content}">
+                <div class="index-title">{name} <span class="info-icon">ⓘ</span></div>
+                <div class="index-threshold">{threshold_display}</div>
+                <div class="index-status" style="color: {data.get('status_color', '#888')}">{status}</div>
+                <div class="sparkline-container"{spark_attr}>{spark}</div>
+                <div class="index-value {data.get('text_color', 'text-white')}">{val}</div>
+                <div class="index-change {data.get('text_color', 'text-white')}">{chg_str}</div>
+                {pct_html}
+                <div class="index-explanation">
+                    <small class="text-muted">{exp['desc']}</small>
+                    <small class="text-info d-block mt-1">{exp['thresholds']}</small>
+                </div>
+            </div>"""
+
+def generate_html(df_main, df_custom, cortex_data, verdict_data, verdict_history=None, events=None, screens=None, rotation=None):
     cat_frames = {}
     categories = {
         "1. CONTEXT DE PIAȚĂ": ['VIX', 'VIX9D', 'VIX3M', 'VXN', 'SKEW'],
@@ -474,7 +1934,7 @@ def generate_html(df_main, df_custom, cortex_data, verdict_data):
         'SPX': {'desc': 'Indicele principal US', 'thresholds': 'Trend = Direcția pieței'},
         'SMA200%': {'desc': 'Market Breadth', 'thresholds': '> 50% = Bullish | < 50% = Bearish'},
         'Highs-Lows': {'desc': 'Net New Highs', 'thresholds': 'Pozitiv = Bullish | Negativ = Bearish'},
-        'Put/Call Ratio': {'desc': 'Sentiment Optiuni', 'thresholds': '> 1.0 = Fear (Bullish Signal) | < 0.6 = Complacency (MOCK)'},
+        'Put/Call Ratio': {'desc': f"Sentiment Optiuni (volum puts/calls, {'+'.join(PUTCALL_INDEX)})", 'thresholds': '> 1.0 = Fear (Bullish Signal) | < 0.6 = Complacency'},
         'AAII Sentiment': {'desc': 'Investitori Individuali', 'thresholds': 'Contrarian Indicator (MOCK)'}
     }
 
@@ -482,38 +1942,10 @@ def generate_html(df_main, df_custom, cortex_data, verdict_data):
         html_chunk = f'<div class="card bg-dark border-secondary h-100"><div class="card-header border-secondary py-2"><h6 class="mb-0 text-white-50">{cat_name}</h6></div><div class="card-body p-2"><div class="d-flex flex-nowrap gap-2 overflow-auto" style="scrollbar-width: thin;">'
         for name in idx_list:
             data = cortex_data.get(name, {'value': 'N/A', 'change': 0, 'status': 'N/A', 'sparkline': ''})
-            val = data.get('value', 'N/A')
-            chg = data.get('change', 0)
-            status = data.get('status', 'N/A')
-            spark = data.get('sparkline', '')
             exp = explanations.get(name, {'title': name, 'desc': '', 'thresholds': ''})
-            
-            threshold_display = ""
-            if name in ['VIX', 'VIX3M']: threshold_display = "15 NORMAL 20"
-            elif name == 'VXN': threshold_display = "20 NORMAL 30"
-            elif name == 'SKEW': threshold_display = "130 NORMAL 145"
-            elif name == 'MOVE': threshold_display = "80 NORMAL 120"
-            elif name == 'CRYPTO FEAR': threshold_display = "25 NEUTRAL 75"
-            elif name == 'Put/Call Ratio': threshold_display = "0.7 NORMAL 1.0"
-            
-            chg_sign = "+" if isinstance(chg, (int, float)) and chg > 0 else ""
-            chg_str = f"{chg_sign}{chg}" if isinstance(chg, (int, float)) else "-"
-            
-            tooltip_content = f"{exp['desc']}\\n\\n{exp['thresholds']}"
-            
-            html_chunk += f"""
-            <div class="index-card" title="{tooltip_content}">
-                <div class="index-title">{name} <span class="info-icon">ⓘ</span></div>
-                <div class="index-threshold">{threshold_display}</div>
-                <div class="index-status" style="color: {data.get('status_color', '#888')}">{status}</div>
-                <div class="sparkline-container">{spark}</div>
-                <div class="index-value {data.get('text_color', 'text-white')}">{val}</div>
-                <div class="index-change {data.get('text_color', 'text-white')}">{chg_str}</div>
-                <div class="index-explanation">
-                    <small class="text-muted">{exp['desc']}</small>
-                    <small class="text-info d-block mt-1">{exp['thresholds']}</small>
-                </div>
-            </div>"""
+            digest = hashlib.sha1(json.dumps([data, exp], sort_keys=True, default=str).encode()).hexdigest()[:16]
+            key = f"card:{name}:{digest}:{code_version(render_index_card)}"
+            html_chunk += render_cache().get(key, lambda: render_index_card(name, data, exp))
         html_chunk += '</div></div></div>'
         cat_frames[cat_name] = html_chunk
 
@@ -531,62 +1963,14 @@ def generate_html(df_main, df_custom, cortex_data, verdict_data):
     </div>"""
     
     indices_html = row1_html + row2_html
+    verdict_timeline_html = render_verdict_timeline(verdict_history)
+    change_rows = render_events(events)
+    rotation_html = render_rotation(rotation)
+    screen_links = " ".join(
+        f'<a href="{path}" class="badge bg-secondary text-decoration-none me-1">{name} ({count})</a>'
+        for name, (path, count) in (screens or {}).items())
+    if screen_links: screen_links = f'<div class="mb-3 small">Screen-uri salvate: {screen_links}</div>'
 
-    def build_rows(df):
-        rows_html = ""
-        if df is not None and not df.empty:
-            for _, row in df.iterrows():
-                trend_color = "text-warning"
-                if "Strong Bullish" in row['Trend']: trend_color = "text-success"
-                elif "Bearish" in row['Trend']: trend_color = "text-danger"
-                
-                target_color = "text-success" if float(row['To Target %']) > 0 else "text-danger"
-                mom_color = "text-success" if float(row['Momentum_Score']) >= 70 else "text-warning"
-                wl_color = "text-success" if float(row['Watchlist_Score']) >= 70 else "text-muted"
-                
-                rsi_val = float(row['RSI'])
-                rsi_color = "text-danger" if rsi_val > 70 or rsi_val < 30 else "text-muted"
-                
-                decision = row.get('Decision', 'WAIT')
-                dec_color = "text-success" if decision == "BUY" else "text-warning" if decision == "WATCH" else "text-muted"
-                
-                vol = row.get('Volume', 0)
-                vol_display = f"{vol/1000000:.1f}M" if vol > 1000000 else f"{vol/1000:.0f}K"
-
-                rows_html += f"""
-                <tr>
-                    <td class="fw-bold"><a href="https://finviz.com/quote.ashx?t={row['Ticker']}" target="_blank" class="text-white text-decoration-none">{row['Ticker']}</a></td>
-                    <td class="small text-muted">{str(row['Company_Name'])[:15]}..</td>
-                    <td>${row['Price']}</td>
-                    <td><div style="width:100px; overflow:hidden;">{row['Grafic']}</div></td> 
-                    <td class="text-warning fw-bold">${row['Sug. Buy']}</td>
-                    <td>${row['Target']}</td>
-                    <td class="{target_color}">{row['To Target %']}%</td>
-                    <td>{row['Consensus']}</td>
-                    <td>{row['Analysts']}</td>
-                    <td>{row['Inst Own']}%</td>
-                    <td class="{trend_color}">{row['Trend']}</td>
-                    <td class="{rsi_color}">{row['RSI']}</td>
-                    <td class="small">{row['RSI Status']}</td>
-                    <td>{row['ATR']}</td>
-                    <td class="text-danger">${row['Stop Loss']}</td>
-                    <td>${row['SMA 50']}</td>
-                    <td>${row['SMA 200']}</td>
-                    <td class="{ 'text-success' if float(row['Change %']) > 0 else 'text-danger' }">{row['Change %']}%</td>
-                    <td class="{mom_color} fw-bold">{row['Momentum_Score']}</td>
-                    <td class="{wl_color} fw-bold">{row['Watchlist_Score']}</td>
-                    <td class="small">{row['Industry']}</td>
-                    <td class="small">{row['Theme']}</td>
-                    <td class="{dec_color} fw-bold">{decision}</td>
-                    <td>{vol_display}</td>
-                    <td>{row.get('R:R', 0)}</td>
-                </tr>"""
-        return rows_html
-
-
-    rows_main = build_rows(df_main)
-    rows_custom = build_rows(df_custom)
-    
     len_main = len(df_main) if df_main is not None else 0
     len_custom = len(df_custom) if df_custom is not None else 0
 
@@ -612,10 +1996,10 @@ def generate_html(df_main, df_custom, cortex_data, verdict_data):
                 # but we can do a quick check here.
                 
                 # Let's use a quick approach if possible or just standard yfinance
-                tk = yf.Ticker(t)
+                tk = yf_handle(t)
                 
                 # Earnings Date
-                cal = tk.calendar
+                cal = guarded_call('calendar', t, lambda: tk.calendar)
                 if cal is not None and not cal.empty:
                     # cal is usually a Dict or DF. In new yfinance it might be a dictionary with 'Earnings Date' etc.
                     # Or a DataFrame with dates as columns? Structure varies by version.
@@ -726,6 +2110,7 @@ def generate_html(df_main, df_custom, cortex_data, verdict_data):
                             <option value="BUY">BUY</option>
                             <option value="WATCH">WATCH</option>
                             <option value="HOLD">HOLD/ADD</option>
+                            <option value="NO DATA">NO DATA</option>
                         </select>
                     </div>
                     <div class="col-md-2">
@@ -763,7 +2148,7 @@ def generate_html(df_main, df_custom, cortex_data, verdict_data):
     filter_panel_main = create_filter_panel("_main", ind_opts)
     filter_panel_custom = create_filter_panel("_custom", ind_opts)
 
-    html = f"""
+    page_head = f"""
     <!DOCTYPE html>
     <html lang="en" data-bs-theme="dark">
     <head>
@@ -831,7 +2216,8 @@ def generate_html(df_main, df_custom, cortex_data, verdict_data):
                 </ul>
                 
                 <div class="position-absolute top-0 end-0 p-3">
-                    <small class="text-muted">Updated: {(datetime.datetime.utcnow() + datetime.timedelta(hours=2)).strftime('%Y-%m-%d %H:%M')} (RO)</small>
+                    {spark_toggle()}
+                    <small class="text-muted">Updated: <span class="generated-at">{(datetime.datetime.utcnow() + datetime.timedelta(hours=2)).strftime('%Y-%m-%d %H:%M')}</span> (RO)</small>
                 </div>
             </div>
 
@@ -873,44 +2259,37 @@ def generate_html(df_main, df_custom, cortex_data, verdict_data):
                             </div>
                         </div>
                     </div>
+
+                    <!-- VERDICT TIMELINE -->
+                    {verdict_timeline_html}
+
+                    <!-- SECTOR / INDUSTRY ROTATION -->
+                    {rotation_html}
+
+                    <!-- CHANGES SINCE LAST SCAN -->
+                    <div class="card bg-dark border-secondary p-3 mb-4">
+                        <h5 class="mb-3 text-white border-bottom border-secondary pb-2">🔔 Schimbări față de scanarea anterioară</h5>
+                        <div class="table-responsive" style="max-height: 400px;">
+                            <table class="table table-dark table-sm table-striped">
+                                <thead><tr><th>Ticker</th><th>Tip</th><th>Din</th><th>În</th><th>Detalii</th></tr></thead>
+                                <tbody>{change_rows}</tbody>
+                            </table>
+                        </div>
+                    </div>
                 </div>
 
                 <!-- MAIN WATCHLIST (Formerly Home) -->
                 <div class="tab-pane fade" id="watchlist">
+                    {screen_links}
                     <!-- Advanced Filters (Main) -->
                     {filter_panel_main}
                     <div class="card bg-dark border-secondary p-3">
                         <table id="scanTable" class="table table-dark table-hover w-100 table-sm">
                             <thead>
-<tr>
-                                    <th>Ticker</th>
-                                    <th>Company</th>
-                                    <th>Price</th>
-                                    <th style="width:100px;">Grafic</th>
-                                    <th title="Price limit for safe entry based on technical support levels.">Sug. Buy ⓘ</th>
-                                    <th title="Analyst price target consensus.">Target</th>
-                                    <th title="Potential upside to analyst target.">To Target %</th>
-                                    <th title="Average analyst rating (Strong Buy to Sell).">Consensus ⓘ</th>
-                                    <th>Analysts</th>
-                                    <th>Inst %</th>
-                                    <th title="Current technical trend based on SMA50/SMA200 interaction.">Trend ⓘ</th>
-                                    <th title="Relative Strength Index. >70 Overbought, <30 Oversold.">RSI ⓘ</th>
-                                    <th>RSI Status</th>
-                                    <th title="Average True Range. Volatility metric used for stop losses.">ATR</th>
-                                    <th title="Suggested stop loss level (2x ATR below price).">Stop Loss ⓘ</th>
-                                    <th>SMA 50</th>
-                                    <th>SMA 200</th>
-                                    <th title="Daily percentage change. High +% = Momentum.">Change % ⓘ</th>
-                                    <th title="Composite score (0-100) based on Price vs SMAs, RSI, and recent perf.">Mom. Score ⓘ</th>
-                                    <th>WL Score</th>
-                                    <th>Industry</th>
-                                    <th>Theme</th>
-                                    <th title="System logic: BUY if Price < Sug Buy. WATCH if within 5%.">Decizie ⓘ</th>
-                                    <th title="Daily Trading Volume.">Volume</th>
-                                    <th title="Risk/Reward Ratio. Potential reward vs risk to Stop Loss. >2.0 is good.">R:R ⓘ</th>
-                                </tr>
+{TABLE_HEADER}
                             </thead>
-                            <tbody>{rows_main}</tbody>
+                            <tbody>"""
+    page_middle = f"""</tbody>
                         </table>
                     </div>
                 </div>
@@ -923,35 +2302,10 @@ def generate_html(df_main, df_custom, cortex_data, verdict_data):
                     <div class="card bg-dark border-secondary p-3 mb-4">
                         <table id="customTable" class="table table-dark table-hover w-100 table-sm">
                             <thead>
-<tr>
-                                    <th>Ticker</th>
-                                    <th>Company</th>
-                                    <th>Price</th>
-                                    <th style="width:100px;">Grafic</th>
-                                    <th title="Price limit for safe entry based on technical support levels.">Sug. Buy ⓘ</th>
-                                    <th title="Analyst price target consensus.">Target</th>
-                                    <th title="Potential upside to analyst target.">To Target %</th>
-                                    <th title="Average analyst rating (Strong Buy to Sell).">Consensus ⓘ</th>
-                                    <th>Analysts</th>
-                                    <th>Inst %</th>
-                                    <th title="Current technical trend based on SMA50/SMA200 interaction.">Trend ⓘ</th>
-                                    <th title="Relative Strength Index. >70 Overbought, <30 Oversold.">RSI ⓘ</th>
-                                    <th>RSI Status</th>
-                                    <th title="Average True Range. Volatility metric used for stop losses.">ATR</th>
-                                    <th title="Suggested stop loss level (2x ATR below price).">Stop Loss ⓘ</th>
-                                    <th>SMA 50</th>
-                                    <th>SMA 200</th>
-                                    <th title="Daily percentage change. High +% = Momentum.">Change % ⓘ</th>
-                                    <th title="Composite score (0-100) based on Price vs SMAs, RSI, and recent perf.">Mom. Score ⓘ</th>
-                                    <th>WL Score</th>
-                                    <th>Industry</th>
-                                    <th>Theme</th>
-                                    <th title="System logic: BUY if Price < Sug Buy. WATCH if within 5%.">Decizie ⓘ</th>
-                                    <th title="Daily Trading Volume.">Volume</th>
-                                    <th title="Risk/Reward Ratio. Potential reward vs risk to Stop Loss. >2.0 is good.">R:R ⓘ</th>
-                                </tr>
+{TABLE_HEADER}
                             </thead>
-                            <tbody>{rows_custom}</tbody>
+                            <tbody>"""
+    page_tail = f"""</tbody>
                         </table>
                     </div>
                     
@@ -982,6 +2336,8 @@ def generate_html(df_main, df_custom, cortex_data, verdict_data):
             </div>
         </div>
 
+        {AGE_SCRIPT}
+        {SPARK_SCRIPT}
         <script src="https://code.jquery.com/jquery-3.6.0.min.js"></script>
         <script src="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/js/bootstrap.bundle.min.js"></script>
         <script src="https://cdn.datatables.net/1.13.4/js/jquery.dataTables.min.js"></script>
@@ -1019,6 +2375,7 @@ def generate_html(df_main, df_custom, cortex_data, verdict_data):
 
                 var tableMain = initTable('scanTable');
                 var tableCustom = initTable('customTable');
+                $('#scanTable, #customTable').on('draw.dt', function () {{ drawSparks(this); }});
                 window.tables = {{ 'scanTable': tableMain, 'customTable': tableCustom }};
 
                 // Init Bootstrap Tooltips
@@ -1116,18 +2473,378 @@ def generate_html(df_main, df_custom, cortex_data, verdict_data):
     </body>
     </html>
     """
-    with open(OUTPUT_HTML, 'w') as f: f.write(html)
+    write_html_stream(OUTPUT_HTML, [
+        [page_head], iter_rows(df_main),
+        [page_middle], iter_rows(df_custom),
+        [page_tail],
+    ])
+    finish_render_cache()
     print(f"Dashboard generat: {OUTPUT_HTML}")
 
+def parse_fund_batch(raws, defaults=FUND_NUMERIC_DEFAULTS):
+    """Parse the finviz fields of a whole batch in one pass per column (parse_finviz_frame).
+
+    Same rules as parse_finviz_fields: absent keys take their default, placeholders and
+    unparsable values become 0.0. Returns (one nums dict per raw, {ticker: failed fields}).
+    """
+    fields = list(defaults)
+    table = pd.DataFrame([{f: r['fund'].get(f, defaults[f]) for f in fields} for r in raws],
+                         index=[r['Ticker'] for r in raws], columns=fields, dtype=object)
+    typed, report = parse_finviz_frame(table, fields)
+    values = typed[fields].fillna(0.0).to_numpy(dtype='float64')
+    bad = collections.defaultdict(list)
+    for field, failed_tickers in report.items():
+        for t in failed_tickers: bad[t].append(field)
+    return [dict(zip(fields, map(float, row))) for row in values], dict(bad)
+
 def process_ticker_list(tickers):
     results = []
     if not tickers: return None
     print(f"Processing {len(tickers)} symbols...")
-    for t in tickers:
-        print(f"Analizez {t}...", end="\r")
-        res = analyze_ticker(t)
+    # Thread-urile doar asteapta I/O; cate cereri pleaca simultan spre un host decide HostLimiter
+    with concurrent.futures.ThreadPoolExecutor(max_workers=min(FETCH_WORKERS, len(tickers))) as pool:
+        raws = []
+        for k, raw in enumerate(pool.map(fetch_ticker, tickers), 1):
+            print(f"Descarcat {k}/{len(tickers)}...", end="\r")
+            raws.append(raw)
+    # campurile finviz ale intregului lot se parseaza coloana cu coloana, nu simbol cu simbol
+    batch, bad_fields = parse_fund_batch(raws)
+    for t, fields in bad_fields.items():
+        print(f"Avertisment {t}: valori nenumerice Finviz {fields}")
+    for raw, nums in zip(raws, batch):
+        res = score_ticker(raw, nums)
         if res: results.append(res)
-    return pd.DataFrame(results) if results else None
+    return to_result_frame(results) if results else None
+
+# --- PRIORITATE REFRESH (buget de fetch per rulare) ---
+DECISION_PRIORITY = {'BUY': 40, 'WATCH': 35, 'NO DATA': 30, 'HOLD/ADD': 20, 'WAIT': 10, 'AVOID': 0}
+EARNINGS_WINDOW_DAYS = 30
+# (prioritate minima, ore de vechime acceptate): peste 60 -> la fiecare rulare, sub 30 -> o data pe zi
+REFRESH_TIERS = [(60, 0), (30, 6), (0, 24)]
+FETCH_BUDGET = None            # max simboluri descarcate per rulare (None = toate cele scadente)
+
+def refresh_plan(tickers, prev, custom=(), now=None):
+    """Priority, staleness budget and age per ticker, from the previous scan snapshot.
+
+    Priority (0-100) adds up Decision (BUY/WATCH near Sug. Buy first), Momentum_Score / 5,
+    earnings within EARNINGS_WINDOW_DAYS (+25, +15 more inside a week) and custom-list
+    membership (+20). Tickers missing from the snapshot get 100 and are always due.
+    """
+    now = pd.Timestamp(now or datetime.datetime.now())
+    idx = pd.Index(list(dict.fromkeys(tickers)), name='Ticker')
+    if prev is None or prev.empty:
+        prev = pd.DataFrame(columns=['Ticker'])
+    prev = prev.drop_duplicates('Ticker').set_index('Ticker').reindex(idx)
+    col = lambda name: prev[name] if name in prev else pd.Series(np.nan, index=idx)
+
+    days = (pd.to_datetime(col('Earnings'), errors='coerce') - now.normalize()).dt.days
+    priority = (col('Decision').astype(object).map(DECISION_PRIORITY).fillna(0)
+                + pd.to_numeric(col('Momentum_Score'), errors='coerce').fillna(0) / 5
+                + np.where(days.between(0, EARNINGS_WINDOW_DAYS), 25, 0)
+                + np.where(days.between(0, 7), 15, 0)
+                + np.where(idx.isin(list(custom)), 20, 0))
+    known = col('Decision').notna()
+    priority = priority.where(known, 100).clip(0, 100)
+
+    age_h = (now - pd.to_datetime(col('Fetched'), errors='coerce')).dt.total_seconds() / 3600
+    age_h = age_h.fillna(np.inf)
+    budget_h = np.select([priority >= p for p, _ in REFRESH_TIERS], [h for _, h in REFRESH_TIERS], 24)
+    plan = pd.DataFrame({'priority': priority.round(1), 'budget_h': budget_h, 'age_h': age_h.round(2)}, index=idx)
+    plan['due'] = plan['age_h'] >= plan['budget_h']
+    plan['urgency'] = plan['priority'].clip(lower=1) * (1 + plan['age_h'] / plan['budget_h'].clip(lower=1))
+    return plan
+
+def select_for_refresh(plan, budget=None):
+    """Due tickers by urgency; a budget caps them, and any budget left over goes to the freshest-but-not-due."""
+    ranked = plan.sort_values(['due', 'urgency'], ascending=False)
+    if budget is None:
+        return ranked.index[ranked['due']].tolist()
+    return ranked.index[:budget].tolist()
+
+def value_digest(df, cols):
+    """64-bit hash per row of `cols` in a canonical text form, so a typed frame and its CSV read-back hash alike."""
+    canon = {}
+    for c in cols:
+        s = df[c] if c in df else pd.Series(np.nan, index=df.index)
+        if pd.api.types.is_numeric_dtype(s) and not pd.api.types.is_bool_dtype(s):
+            canon[c] = [f"{v:.{CSV_DECIMALS}f}" if v == v else '' for v in s.astype('float64').round(CSV_DECIMALS)]
+        else:
+            canon[c] = s.astype(object).where(s.notna(), '').astype(str).tolist()
+    return pd.util.hash_pandas_object(pd.DataFrame(canon, index=df.index), index=False).to_numpy()
+
+def stamp_changed(fresh, prev):
+    """Set 'Changed' on freshly fetched rows: the previous stamp if the values are the same as last scan, else Fetched.
+
+    The page and the CSV publish Changed instead of Fetched, so refetching an unchanged row
+    does not rewrite them.
+    """
+    if fresh is None: return None
+    fresh = fresh.copy()
+    fresh['Changed'] = fresh['Fetched']
+    if prev is None or prev.empty or 'Fetched' not in prev: return fresh
+    prev = prev.drop_duplicates('Ticker').set_index('Ticker')
+    old_stamp = (prev['Changed'].fillna(prev['Fetched']) if 'Changed' in prev else prev['Fetched']).reindex(fresh['Ticker'])
+    cols = [c for c in CSV_COLUMNS if c not in ROW_KEY_EXCLUDE and c != 'Ticker']
+    old = prev.reindex(fresh['Ticker']).reset_index()
+    same = (value_digest(fresh, cols) == value_digest(old, cols)) & old_stamp.notna().to_numpy()
+    fresh.loc[same, 'Changed'] = old_stamp.to_numpy()[same]
+    return fresh
+
+def carry_rows(prev, tickers):
+    """Rows of the previous scan for tickers skipped this run, marked Carried.
+
+    The spark is rebuilt from the OHLC panel; a ticker the panel does not have keeps the previous one.
+    """
+    if prev is None or prev.empty or not tickers: return None
+    rows = prev.drop_duplicates('Ticker').set_index('Ticker').reindex(tickers).dropna(subset=['Decision'])
+    rows = rows.drop(columns=['List'], errors='ignore').reset_index()
+    if rows.empty: return None
+    rows['Changed'] = rows['Changed'].fillna(rows['Fetched']) if 'Changed' in rows else rows.get('Fetched')
+    def spark(t, old):
+        hist = panel_history(OHLC_PANEL, t, SPARK_BARS)
+        return hist['Close'].to_numpy(dtype=np.float32) if hist is not None and not hist.empty else spark_from_text(old)
+    rows['Spark'] = [spark(t, old) for t, old in zip(rows['Ticker'], rows.get('Spark', [None] * len(rows)))]
+    rows['Carried'] = True
+    return apply_result_schema(rows)
+
+def scheduled_scan(tickers, custom=(), budget=None, full=False):
+    """Fetch the tickers the schedule picks, reuse the previous rows for the rest.
+
+    Returns one row per ticker (file order). `full` ignores the schedule and fetches everything.
+    """
+    tickers = list(dict.fromkeys(tickers))
+    last = load_scan_snapshot()
+    prev = None if full else last
+    plan = refresh_plan(tickers, prev, custom)
+    fetch = tickers if full else select_for_refresh(plan, budget)
+    dead = skip_quarantined(fetch)
+    if dead:
+        print(f"Carantina: sar peste {len(dead)} simboluri fara date la toti providerii")
+        fetch = [t for t in fetch if t not in set(dead)]
+    skipped = [t for t in tickers if t not in set(fetch)]
+    print(f"Refresh: {len(fetch)} de descarcat, {len(skipped)} reutilizate din scanarea anterioara")
+    RUN_REPORT['refresh'] = {'fetched': len(fetch), 'reused': len(skipped), 'budget': budget,
+                             'due': int(plan['due'].sum())}
+
+    fresh = stamp_changed(quality_gate(process_ticker_list(fetch)), last)
+    if fresh is not None: fresh['Carried'] = False
+    frames = [f for f in (fresh, carry_rows(prev, skipped)) if f is not None]
+    if not frames: return None
+    df = pd.concat(frames, ignore_index=True)
+    order = {t: k for k, t in enumerate(tickers)}
+    df = add_target_odds(df.sort_values('Ticker', key=lambda c: c.map(order)).reset_index(drop=True))
+    return apply_result_schema(df)
+
+# --- PROBABILITATE TARGET INAINTE DE STOP (Monte Carlo, vectorizat) ---
+MC_PATHS = 100_000
+MC_HORIZON = 126               # zile de tranzactionare (~6 luni); ce nu atinge niciun nivel iese "timeout"
+MC_SEED = 7                    # aceleasi traiectorii la fiecare rulare
+MC_CHUNK = 4096                # traiectorii per lot (memoria ramane ~40MB)
+MC_GRID = np.geomspace(0.05, 4 * np.sqrt(MC_HORIZON), 48)   # distante pana la nivel, in sigma zilnice
+VOL_BARS = 63                  # volatilitate istorica din ultimele ~3 luni de pe panel
+ATR_RANGE_SIGMA = 1.6          # E[range zilnic] ~ 1.6 sigma pentru miscare browniana
+MC_BARRIER_SHIFT = 0.5826      # corectie Broadie-Glasserman-Kou: pasi zilnici -> nivel atins si intraday
+MC_TABLE = None
+
+def first_passage(walk, levels):
+    """First step (0-based) at which each path reaches each level from below; walk.shape[1] if never.
+
+    The running max is nondecreasing per row, so offsetting every row by a constant makes the
+    whole array sorted and one np.searchsorted answers all (path, level) pairs at once.
+    """
+    n, h = walk.shape
+    run = np.maximum.accumulate(walk, axis=1).astype(np.float64)
+    span = max(float(run.max()), float(levels.max())) - float(run.min()) + 1
+    offset = np.arange(n)[:, None] * span
+    pos = np.searchsorted((run + offset).ravel(), (levels[None, :] + offset).ravel())
+    return (pos.reshape(n, len(levels)) - np.arange(n)[:, None] * h).astype(np.int16)
+
+def mc_table(paths=MC_PATHS, horizon=MC_HORIZON, seed=MC_SEED, grid=MC_GRID):
+    """(P(up level a before down level b), E[days held]) on a grid of (a, b), in daily-sigma units.
+
+    Log price follows a zero-drift random walk; dividing by each ticker's sigma maps its Target and
+    Stop Loss onto the same standard walk, so one set of paths serves every ticker.
+    """
+    rng = np.random.default_rng(seed)
+    wins = np.zeros((len(grid), len(grid)))
+    days = np.zeros((len(grid), len(grid)))
+    for start in range(0, paths, MC_CHUNK):
+        walk = rng.standard_normal((min(MC_CHUNK, paths - start), horizon), dtype=np.float32).cumsum(axis=1)
+        up, down = first_passage(walk, grid), first_passage(-walk, grid)
+        wins += (up[:, :, None] < down[:, None, :]).sum(axis=0)
+        days += np.minimum(np.minimum(up[:, :, None], down[:, None, :]) + 1, horizon).sum(axis=0)
+    return wins / paths, days / paths
+
+def grid_lookup(table, grid, a, b):
+    """Bilinear interpolation of `table` at (a, b) on log(grid); points outside are clamped to the edge."""
+    lg = np.log(grid)
+    def locate(x):
+        lx = np.log(np.clip(x, grid[0], grid[-1]))
+        i = np.clip(np.searchsorted(lg, lx) - 1, 0, len(grid) - 2)
+        return i, (lx - lg[i]) / (lg[i + 1] - lg[i])
+    i, wa = locate(a)
+    j, wb = locate(b)
+    return (table[i, j] * (1 - wa) * (1 - wb) + table[i + 1, j] * wa * (1 - wb)
+            + table[i, j + 1] * (1 - wa) * wb + table[i + 1, j + 1] * wa * wb)
+
+def daily_sigma(df, panel=None):
+    """Daily log-return volatility per row: panel history when there are enough bars, else ATR / Price."""
+    price = pd.to_numeric(df['Price'], errors='coerce').to_numpy(np.float64)
+    atr = pd.to_numeric(df['ATR'], errors='coerce').to_numpy(np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sigma = atr / price / ATR_RANGE_SIGMA
+    if panel is None: return sigma
+    index = panel['ticker_index']
+    hits = [(k, index[t]) for k, t in enumerate(df['Ticker']) if t in index]
+    if not hits: return sigma
+    ks, rows = (list(x) for x in zip(*hits))
+    closes = np.asarray(panel['fields']['Close'][rows, -(VOL_BARS + 1):], dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        r = np.diff(np.log(closes), axis=1)
+    valid = np.isfinite(r)
+    count = valid.sum(axis=1)
+    mean = np.where(valid, r, 0).sum(axis=1) / np.maximum(count, 1)
+    var = (np.where(valid, r - mean[:, None], 0) ** 2).sum(axis=1) / np.maximum(count - 1, 1)
+    enough = count >= VOL_BARS // 3
+    sigma[np.array(ks)[enough]] = np.sqrt(var[enough])
+    return sigma
+
+def add_target_odds(df, panel=None):
+    """'Target Prob %' (Target hit before Stop Loss) and 'Hold Days' (expected days until either).
+
+    Rows without a usable Target above / Stop below the price, or flagged NO DATA, get 0 for both.
+    """
+    global MC_TABLE
+    if df is None or df.empty: return df
+    panel = panel if panel is not None else OHLC_PANEL
+    if MC_TABLE is None:
+        t0 = time.perf_counter()
+        MC_TABLE = mc_table()
+        RUN_REPORT['target_odds'] = {'paths': MC_PATHS, 'horizon': MC_HORIZON, 'seed': MC_SEED,
+                                     'table_ms': round((time.perf_counter() - t0) * 1000)}
+    num = lambda c: pd.to_numeric(df[c], errors='coerce').to_numpy(np.float64)
+    price, target, stop = num('Price'), num('Target'), num('Stop Loss')
+    sigma = daily_sigma(df, panel)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        a = np.log(target / price) / sigma
+        b = np.log(price / stop) / sigma
+    ok = np.isfinite(a) & np.isfinite(b) & (a > 0) & (b > 0) & (df['Decision'].astype(str) != 'NO DATA').to_numpy()
+    wins, days = MC_TABLE
+    a, b = a - MC_BARRIER_SHIFT, b - MC_BARRIER_SHIFT
+    df = df.copy()
+    df['Target Prob %'] = np.where(ok, np.round(grid_lookup(wins, MC_GRID, a, b) * 100, 1), 0)
+    df['Hold Days'] = np.where(ok, np.round(grid_lookup(days, MC_GRID, a, b)), 0)
+    return df
+
+def split_lists(df, lists):
+    """One scanned frame -> {list name: rows of that list in file order}."""
+    out = {}
+    for name, tickers in lists.items():
+        if df is None:
+            out[name] = None
+            continue
+        order = {t: k for k, t in enumerate(tickers)}
+        part = df[df['Ticker'].isin(order)]
+        part = part.sort_values('Ticker', key=lambda c: c.map(order)).reset_index(drop=True)
+        out[name] = part if not part.empty else None
+    return out
+
+# --- CALITATEA DATELOR (verificari vectorizate + re-descarcare tintita) ---
+RR_LIMIT = 25                  # |R:R| peste atat = target sau ATR gresit
+STALE_DAYS = 5                 # ultima bara din panel mai veche decat cea mai noua cu >5 zile
+QUALITY_RETRIES = 1
+
+def panel_lag_days(panel, tickers):
+    """Days between each ticker's last Close in the panel and the newest panel date (0 if not stored)."""
+    lag = np.zeros(len(tickers))
+    if panel is None or not len(panel['dates']): return lag
+    rows = np.array([panel['ticker_index'].get(t, -1) for t in tickers])
+    found = rows >= 0
+    if not found.any(): return lag
+    valid = ~np.isnan(panel['fields']['Close'][rows[found]])
+    last = valid.shape[1] - 1 - np.argmax(valid[:, ::-1], axis=1)
+    days = (panel['dates'][-1] - panel['dates'][last]).astype('timedelta64[D]').astype(float)
+    lag[found] = np.where(valid.any(axis=1), days, np.inf)
+    return lag
+
+def quality_flags(df, panel=None):
+    """Boolean frame (rows x checks) of the sanity checks; a row passes when every column is False.
+
+    Catches the zero defaults analyze_ticker falls back to when a provider fails: no price / RSI /
+    ATR / volume, SMA 50 == SMA 200 == Price (finviz SMA fields missing), no target although
+    analysts cover it, R:R outliers and stale prices (flat spark or an old last bar in the panel).
+    """
+    num = lambda c: pd.to_numeric(df[c], errors='coerce').to_numpy(dtype=np.float64)
+    price, sma50, sma200, rr = num('Price'), num('SMA 50'), num('SMA 200'), num('R:R')
+    flat = np.array([len(s) >= 5 and np.ptp(s) == 0 for s in df['Spark']]) if 'Spark' in df else False
+    with np.errstate(invalid='ignore'):
+        flags = {
+            'price': ~(price > 0),
+            'rsi': ~(num('RSI') > 0),
+            'atr': ~(num('ATR') > 0),
+            'volume': ~(num('Volume') > 0),
+            'sma_equal': (sma50 == sma200) & (sma50 == price) | ~(sma50 > 0) | ~(sma200 > 0),
+            'target': ~(num('Target') > 0) & (num('Analysts') > 0),
+            'rr_outlier': ~np.isfinite(rr) | (np.abs(rr) > RR_LIMIT),
+            'stale': flat | (panel_lag_days(panel, df['Ticker'].tolist()) > STALE_DAYS),
+        }
+    return pd.DataFrame(flags, index=df.index)
+
+def mark_bad_rows(df, flags):
+    """Rows that failed a check get Decision NO DATA and no scores instead of a WATCH/WAIT verdict."""
+    df = df.copy()
+    bad = flags.any(axis=1)
+    names = np.array(flags.columns)
+    df['Data_Status'] = [",".join(names[r]) for r in flags.to_numpy()]
+    df.loc[bad, 'Decision'] = 'NO DATA'
+    df.loc[bad, ['Momentum_Score', 'Watchlist_Score']] = 0
+    df.loc[bad, 'R:R'] = 0
+    return df
+
+def forget_tickers(tickers):
+    """Drop the run's cached state for `tickers` before a refetch; returns the (possibly reopened) OHLC panel.
+
+    The yf.Ticker handles go (their .info is cached per instance), and the panel rows are brought
+    up to date when this process owns the panel; --workers children leave it to the parent.
+    """
+    global OHLC_PANEL
+    with YF_HANDLES_LOCK:
+        for t in tickers: YF_HANDLES.pop(t, None)
+    if PANEL_OWNER:
+        OHLC_PANEL = refresh_ohlc_panel(tickers)
+    return OHLC_PANEL
+
+def quality_gate(df, refetch=None, panel=None):
+    """Check the fetched rows, refetch only the flagged tickers, mark whatever still fails."""
+    if df is None or df.empty: return df
+    own_panel = panel is None
+    panel = panel if panel is not None else OHLC_PANEL
+    refetch = refetch or process_ticker_list
+    flags = quality_flags(df, panel)
+    flagged = flags.any(axis=1)
+    report = {'checked': len(df), 'flagged': int(flagged.sum()),
+              'by_check': {k: int(v) for k, v in flags.sum().items() if v}}
+    for _ in range(QUALITY_RETRIES):
+        bad = flags.any(axis=1) & ~df['Ticker'].map(lambda t: is_quarantined('finviz', t) or is_quarantined('yahoo', t)).astype(bool)
+        if not bad.any(): break
+        print(f"Calitate date: {int(bad.sum())} randuri suspecte ({', '.join(report['by_check'])}), le descarc din nou")
+        tickers = df.loc[bad, 'Ticker'].tolist()
+        fresh_panel = forget_tickers(tickers)
+        if own_panel: panel = fresh_panel
+        again = refetch(tickers)
+        if again is None: break
+        order = {t: k for k, t in enumerate(df['Ticker'])}
+        df = pd.concat([df[~df['Ticker'].isin(again['Ticker'])], again], ignore_index=True)
+        df = apply_result_schema(df.sort_values('Ticker', key=lambda c: c.map(order)).reset_index(drop=True))
+        flags = quality_flags(df, panel)
+
+    df = apply_result_schema(mark_bad_rows(df, flags))
+    report['marked'] = int(flags.any(axis=1).sum())
+    report['recovered'] = report['flagged'] - report['marked']
+    if report['marked']:
+        print(f"Calitate date: {report['marked']} randuri marcate NO DATA, {report['recovered']} recuperate")
+    RUN_REPORT['quality'] = report
+    return df
 
 def check_market_status(force=False):
     if force:
@@ -1163,37 +2880,835 @@ def check_market_status(force=False):
         print(f"Warning: Could not check market status ({e}). Proceeding carefully.")
         return True # Default to running if check fails
 
+# --- CHANGE DETECTION / ALERTE ---
+SCAN_SNAPSHOT = os.path.join(CACHE_DIR, 'last_scan.csv')
+VERDICT_SNAPSHOT = os.path.join(CACHE_DIR, 'last_verdict.json')
+EVENTS_JSON = 'scan_events.json'
+EVENTS_CSV = 'scan_events.csv'
+EVENT_COLUMNS = ['time', 'ticker', 'type', 'from', 'to', 'detail']
+RSI_LEVELS = (30, 70)
+
+def combine_lists(df_main, df_custom):
+    """One frame with a List column; a ticker in both watchlists keeps one row per list."""
+    frames = [df.assign(List=name) for name, df in [('main', df_main), ('custom', df_custom)]
+              if df is not None and not df.empty]
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=CSV_COLUMNS + ['List'])
+
+def spark_to_text(spark):
+    return ' '.join(f"{v:g}" for v in spark)
+
+def spark_from_text(value):
+    return np.array(str(value).split() if isinstance(value, str) else [], dtype=np.float32)
+
+def save_scan_snapshot(df_all, path=None):
+    """Last published scan; the spark is kept as text so carry_rows has one when the panel has none."""
+    path = path or SCAN_SNAPSHOT
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    cols = [c for c in CSV_COLUMNS + ['List', 'Spark'] if c in df_all.columns]
+    out = df_all[cols].copy()
+    if 'Spark' in out: out['Spark'] = [spark_to_text(v) for v in out['Spark']]
+    write_csv_atomic(out, path)
+
+def load_scan_snapshot(path=None):
+    try:
+        return pd.read_csv(path or SCAN_SNAPSHOT, keep_default_na=False, na_values=[''])
+    except (FileNotFoundError, pd.errors.EmptyDataError):
+        return None
+
+def diff_scans(prev, curr, now=None):
+    """Events between two scans, keyed by Ticker, using whole-column comparisons.
+
+    Emits NEW / REMOVED tickers, DECISION changes, TREND changes and RSI crossings of
+    30/70. Returns a DataFrame with EVENT_COLUMNS.
+    """
+    now = now or datetime.datetime.now().strftime('%Y-%m-%d %H:%M')
+    if prev is None or prev.empty or curr is None or curr.empty:
+        return pd.DataFrame(columns=EVENT_COLUMNS)
+    cols = ['Decision', 'Trend', 'RSI']
+    a = prev.drop_duplicates('Ticker').set_index('Ticker')[cols]
+    b = curr.drop_duplicates('Ticker').set_index('Ticker')[cols]
+    j = b.join(a, rsuffix='_prev', how='outer')
+
+    in_prev = j.index.isin(a.index)
+    in_curr = j.index.isin(b.index)
+    both = in_prev & in_curr
+    text = lambda c: j[c].astype(object).where(j[c].notna(), '').astype(str).to_numpy()
+    dec, dec_p = text('Decision'), text('Decision_prev')
+    trend, trend_p = text('Trend'), text('Trend_prev')
+    rsi = j['RSI'].to_numpy(dtype='float64')
+    rsi_p = j['RSI_prev'].to_numpy(dtype='float64')
+
+    parts = []
+    def emit(mask, kind, frm, to, detail=''):
+        if not mask.any(): return
+        pick = lambda v: np.asarray(v, dtype=object)[mask] if np.ndim(v) else v
+        parts.append(pd.DataFrame({'time': now, 'ticker': j.index[mask], 'type': kind,
+                                   'from': pick(frm), 'to': pick(to), 'detail': pick(detail)}))
+
+    emit(in_curr & ~in_prev, 'NEW', '', dec)
+    emit(in_prev & ~in_curr, 'REMOVED', dec_p, '')
+    emit(both & (dec != dec_p), 'DECISION', dec_p, dec)
+    emit(both & (trend != trend_p), 'TREND', trend_p, trend,
+         np.where(trend == 'Bearish', 'Turned Bearish', np.where(trend_p == 'Bearish', 'Left Bearish', '')))
+    for level in RSI_LEVELS:
+        # rsi 0.0 = lipsa date, nu o traversare reala
+        valid = both & (rsi > 0) & (rsi_p > 0)
+        emit(valid & (rsi_p < level) & (rsi >= level), 'RSI_CROSS_UP', rsi_p.round(2), rsi.round(2), f"RSI {level}")
+        emit(valid & (rsi_p >= level) & (rsi < level), 'RSI_CROSS_DOWN', rsi_p.round(2), rsi.round(2), f"RSI {level}")
+
+    if not parts:
+        return pd.DataFrame(columns=EVENT_COLUMNS)
+    return pd.concat(parts, ignore_index=True)[EVENT_COLUMNS]
+
+def diff_verdict(prev_verdict, verdict_data, now=None):
+    now = now or datetime.datetime.now().strftime('%Y-%m-%d %H:%M')
+    if not prev_verdict or prev_verdict.get('signal_pure') == verdict_data['signal_pure']:
+        return pd.DataFrame(columns=EVENT_COLUMNS)
+    return pd.DataFrame([{'time': now, 'ticker': 'MARKET', 'type': 'VERDICT',
+                          'from': prev_verdict.get('signal_pure'), 'to': verdict_data['signal_pure'],
+                          'detail': verdict_data['verdict']}], columns=EVENT_COLUMNS)
+
+def load_json(path, default=None):
+    try:
+        with open(path) as f: return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return default
+
+def save_json(path, data):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w') as f: json.dump(data, f, indent=1, default=str)
+    os.replace(tmp, path)
+
+def write_events(events):
+    events.to_csv(EVENTS_CSV, index=False)
+    save_json(EVENTS_JSON, events.to_dict('records'))
+
+# Sink-uri locale: 'file:alerts.jsonl' sau 'webhook:http://127.0.0.1:8080/hook'
+def file_sink(target, events):
+    with open(target, 'a') as f:
+        for ev in events.to_dict('records'):
+            f.write(json.dumps(ev, default=str) + "\n")
+
+def webhook_sink(target, events):
+    r = requests.post(target, json={'events': events.to_dict('records')}, timeout=10)
+    r.raise_for_status()
+
+ALERT_SINKS = {
+    'file': file_sink,
+    'webhook': webhook_sink,
+}
+
+def parse_sink(value):
+    kind, _, target = value.partition(':')
+    if kind not in ALERT_SINKS or not target:
+        raise argparse.ArgumentTypeError(f"Sink invalid '{value}' (format: {'|'.join(ALERT_SINKS)}:<target>)")
+    return kind, target
+
+def dispatch_events(events, sinks):
+    if events.empty: return
+    for kind, target in sinks:
+        try:
+            ALERT_SINKS[kind](target, events)
+            print(f"Alerte trimise ({kind}): {len(events)} evenimente")
+        except Exception as e:
+            print(f"Eroare sink {kind} {target}: {e}")
+
+def detect_changes(df_main, df_custom, verdict_data, sinks=()):
+    """Compare with the previous run, store the new snapshot, write and dispatch the events."""
+    curr = combine_lists(df_main, df_custom)
+    events = pd.concat([diff_verdict(load_json(VERDICT_SNAPSHOT), verdict_data),
+                        diff_scans(load_scan_snapshot(), curr)], ignore_index=True)
+    save_scan_snapshot(curr)
+    save_json(VERDICT_SNAPSHOT, verdict_data)
+    write_events(events)
+    print(f"Change detection: {len(events)} evenimente")
+    dispatch_events(events, sinks)
+    return events
+
+def render_events(events, limit=200):
+    if events is None or events.empty:
+        return '<tr><td colspan="5" class="text-muted text-center">Nicio schimbare față de scanarea anterioară.</td></tr>'
+    colors = {'BUY': 'text-success', 'Bearish': 'text-danger', 'SELL': 'text-danger', 'AVOID': 'text-danger'}
+    return "".join(
+        f'<tr><td class="fw-bold">{ev["ticker"]}</td><td><span class="badge bg-secondary">{ev["type"]}</span></td>'
+        f'<td>{ev["from"]}</td><td class="{colors.get(str(ev["to"]), "")}">{ev["to"]}</td><td class="small">{ev["detail"]}</td></tr>'
+        for ev in events.head(limit).to_dict('records'))
+
+# --- ROTATIE SECTOARE / INDUSTRII (agregate pe grup, vectorizat) ---
+ROTATION_LOOKBACK = 21        # randament pe ~1 luna
+ROTATION_CORR_BARS = 63       # ~3 luni de randamente zilnice pentru corelatii
+ROTATION_HEATMAP = 15         # grupuri afisate in heatmap (cele mai mari)
+SPX_SYMBOL = '^GSPC'
+
+def group_matrix(labels):
+    """Labels -> (codes, names, one-hot matrix groups x members) for grouped sums via matmul."""
+    codes, names = pd.factorize(pd.Series(labels).astype(object).fillna('Unknown'), sort=True)
+    onehot = np.zeros((len(names), len(codes)), dtype=np.float64)
+    onehot[codes, np.arange(len(codes))] = 1.0
+    return codes, list(names), onehot
+
+def panel_returns(panel, tickers, lookback=ROTATION_LOOKBACK, corr_bars=ROTATION_CORR_BARS):
+    """(lookback return per ticker, daily log returns tickers x corr_bars) from the panel; NaN where missing."""
+    n = len(tickers)
+    if panel is None or not len(panel['dates']):
+        return np.full(n, np.nan), np.full((n, corr_bars), np.nan)
+    rows = np.array([panel['ticker_index'].get(t, -1) for t in tickers])
+    found = rows >= 0
+    width = max(lookback, corr_bars) + 1
+    closes = np.full((n, width), np.nan)
+    block = np.asarray(panel['fields']['Close'][rows[found], -width:], dtype=np.float64)
+    closes[found, width - block.shape[1]:] = block
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ret = closes[:, -1] / closes[:, -lookback - 1] - 1
+        daily = np.diff(np.log(closes[:, -corr_bars - 1:]), axis=1)
+    return ret, daily
+
+def spx_return(panel, store=None, lookback=ROTATION_LOOKBACK):
+    """SPX return over the same dates as the panel lookback window."""
+    store = load_cortex_store() if store is None else store
+    if panel is None or store.empty or SPX_SYMBOL not in store or len(panel['dates']) <= lookback:
+        return np.nan
+    spx = store[SPX_SYMBOL].dropna()
+    window = pd.DatetimeIndex(panel['dates'][[-lookback - 1, -1]])
+    start, end = spx.reindex(spx.index.union(window)).ffill().loc[window]
+    return end / start - 1
+
+def rotation_analytics(df, by='Industry', panel=None, spx_ret=np.nan):
+    """Per-group aggregates over the whole scan plus the correlation matrix of group returns.
+
+    Columns: Members, Momentum (median Momentum_Score), Strong_Bull % (share in Strong Bullish),
+    Ret_1M % (median member return), vs_SPX (Ret_1M minus the SPX return). Group returns for the
+    correlation matrix are the equal-weighted mean of member daily log returns.
+    """
+    if df is None or df.empty or by not in df:
+        return pd.DataFrame(), pd.DataFrame()
+    df = df.drop_duplicates('Ticker')
+    codes, names, onehot = group_matrix(df[by].to_numpy())
+    ret, daily = panel_returns(panel, df['Ticker'].tolist())
+
+    grouped = pd.DataFrame({
+        'group': pd.Categorical.from_codes(codes, names),
+        'momentum': df['Momentum_Score'].to_numpy(dtype=np.float64),
+        'strong': (df['Trend'].astype(object) == 'Strong Bullish').to_numpy(dtype=np.float64),
+        'ret': ret,
+    }).groupby('group', observed=False)
+    stats = pd.DataFrame({
+        'Members': grouped.size(),
+        'Momentum': grouped['momentum'].median(),
+        'Strong_Bull %': grouped['strong'].mean() * 100,
+        'Ret_1M %': grouped['ret'].median() * 100,
+    })
+    stats['vs_SPX'] = stats['Ret_1M %'] - spx_ret * 100
+    stats.index.name = by
+    stats = stats.round(2).sort_values(['vs_SPX', 'Momentum'], ascending=False, na_position='last')
+
+    valid = ~np.isnan(daily)
+    counts = onehot @ valid
+    with np.errstate(invalid='ignore', divide='ignore'):
+        group_ret = (onehot @ np.where(valid, daily, 0.0)) / counts
+        corr = np.corrcoef(group_ret)
+    corr = pd.DataFrame(np.atleast_2d(corr), index=names, columns=names).round(2)
+    return stats, corr
+
+def compute_rotation(df_all, panel=None):
+    """Industry and Theme rotation for the combined scan; panel defaults to the run's OHLC panel."""
+    panel = panel if panel is not None else (OHLC_PANEL if OHLC_PANEL is not None else open_ohlc_panel())
+    ret_spx = spx_return(panel)
+    return {by: rotation_analytics(df_all, by, panel, ret_spx) for by in ['Industry', 'Theme']}
+
+def heat_color(value, limit):
+    """Red (negative) .. green (positive) background, alpha proportional to |value| / limit."""
+    if value is None or pd.isna(value) or not limit: return "transparent"
+    a = min(abs(value) / limit, 1.0) * 0.6
+    return f"rgba(76,175,80,{a:.2f})" if value > 0 else f"rgba(244,67,54,{a:.2f})"
+
+def render_rotation(rotation, limit=ROTATION_HEATMAP):
+    """Compact heatmap tables: group aggregates (per Industry / Theme) and the Industry correlation matrix."""
+    if not rotation: return ""
+    cards = ""
+    for by, (stats, corr) in rotation.items():
+        if stats.empty: continue
+        top = stats[stats['Members'] > 0].iloc[:limit]
+        scales = {c: float(np.nanmax(np.abs(stats[c].to_numpy(dtype=np.float64)))) if stats[c].notna().any() else 0
+                  for c in ['vs_SPX', 'Ret_1M %']}
+        scales.update({'Momentum': 50, 'Strong_Bull %': 50})
+        centers = {'Momentum': 50, 'Strong_Bull %': 50, 'Ret_1M %': 0, 'vs_SPX': 0}
+        rows = "".join(
+            f'<tr><td class="text-nowrap">{name}</td><td>{int(r["Members"])}</td>'
+            + "".join(f'<td style="background:{heat_color(r[c] - centers[c], scales[c])}">'
+                      f'{"-" if pd.isna(r[c]) else r[c]}</td>' for c in ['Momentum', 'Strong_Bull %', 'Ret_1M %', 'vs_SPX'])
+            + '</tr>'
+            for name, r in top.iterrows())
+        cards += f"""
+                        <div class="col-lg-6 mb-3">
+                            <div class="small text-muted mb-2">{by} — top {len(top)} după randament relativ vs SPX</div>
+                            <table class="table table-dark table-sm mb-0 small">
+                                <thead><tr><th>{by}</th><th>#</th><th>Mom.</th><th>% Strong Bull</th><th>Ret 1M %</th><th>vs SPX</th></tr></thead>
+                                <tbody>{rows}</tbody>
+                            </table>
+                        </div>"""
+
+    stats, corr = rotation.get('Industry', (pd.DataFrame(), pd.DataFrame()))
+    corr_html = ""
+    if not corr.empty and corr.notna().any().any():
+        names = [n for n in stats.sort_values('Members', ascending=False).index[:limit] if n in corr.index]
+        sub = corr.loc[names, names]
+        head = "".join(f'<th title="{n}">{k + 1}</th>' for k, n in enumerate(names))
+        body = "".join(
+            f'<tr><td class="text-nowrap">{k + 1}. {n}</td>'
+            + "".join(f'<td style="background:{heat_color(v, 1)}">{"" if pd.isna(v) else f"{v:.1f}"}</td>' for v in sub.loc[n])
+            + '</tr>'
+            for k, n in enumerate(names))
+        corr_html = f"""
+                        <div class="col-12">
+                            <div class="small text-muted mb-2">Corelație randamente industrii ({ROTATION_CORR_BARS} zile)</div>
+                            <div class="table-responsive"><table class="table table-dark table-sm mb-0 small text-center">
+                                <thead><tr><th></th>{head}</tr></thead>
+                                <tbody>{body}</tbody>
+                            </table></div>
+                        </div>"""
+    if not cards and not corr_html: return ""
+    return f"""
+                    <div class="card bg-dark border-secondary p-3 mb-4">
+                        <h5 class="mb-3 text-white border-bottom border-secondary pb-2">🔄 Rotație Sectoare / Industrii</h5>
+                        <div class="row">{cards}{corr_html}
+                        </div>
+                    </div>"""
+
+# --- SCREENING (filtre declarative + top-N) ---
+SCREENS_FILE = 'screens.json'   # screen-uri salvate de utilizator (optional)
+SCREENS_DIR = 'screens'         # cate un mini-dashboard per screen
+SCREEN_OPS = ['==', '!=', '>=', '<=', '>', '<', 'in', 'between']
+SCREEN_RE = re.compile(r'^\s*(?P<col>.+?)\s+(?P<op>==|!=|>=|<=|>|<|in|between)\s+(?P<val>.+?)\s*$')
+
+SAVED_SCREENS = {
+    'pullback_buys': {
+        'filters': ['Decision in BUY,WATCH', 'Trend in Strong Bullish,Bullish Pullback', 'RSI between 1..45'],
+        'rank_by': 'Watchlist_Score', 'top': 25,
+    },
+    'momentum_leaders': {
+        'filters': ['Trend == Strong Bullish', 'RSI between 50..70', 'Volume >= 1000000'],
+        'rank_by': 'Momentum_Score', 'top': 25,
+    },
+    'best_rr': {
+        'filters': ['Consensus in Strong Buy,Buy', 'Analysts >= 5', 'To Target % >= 10', 'R:R >= 2'],
+        'rank_by': 'R:R', 'top': 25,
+    },
+}
+
+def compile_filter(expr):
+    """'RSI between 30..50' / 'Consensus in Buy,Strong Buy' / 'R:R >= 2' -> fn(df) returning a bool mask."""
+    m = SCREEN_RE.match(expr)
+    if not m:
+        raise ValueError(f"Filtru invalid '{expr}' (format: <coloana> <{'|'.join(SCREEN_OPS)}> <valoare>)")
+    col, op, val = m.group('col'), m.group('op'), m.group('val')
+
+    def as_number(v):
+        return float(v.replace(',', '').replace('%', ''))
+
+    if op == 'between':
+        lo, hi = (as_number(v) for v in re.split(r'\.\.|,', val, maxsplit=1))
+        test = lambda x: (x >= lo) & (x <= hi)
+        numeric = True
+    elif op == 'in':
+        choices = [v.strip() for v in val.split(',')]
+        test = lambda x: np.isin(x, choices)
+        numeric = False
+    else:
+        try:
+            target, numeric = as_number(val), True
+        except ValueError:
+            target, numeric = val, False
+        if not numeric and op not in ('==', '!='):
+            raise ValueError(f"Filtru invalid '{expr}': {op} cere o valoare numerica")
+        test = {'==': lambda x: x == target, '!=': lambda x: x != target,
+                '>=': lambda x: x >= target, '<=': lambda x: x <= target,
+                '>': lambda x: x > target, '<': lambda x: x < target}[op]
+
+    def mask(df):
+        if col not in df.columns:
+            raise KeyError(f"Coloana necunoscuta in filtru: '{col}'")
+        values = df[col].to_numpy(dtype='float64') if numeric else df[col].astype(str).to_numpy()
+        return np.asarray(test(values), dtype=bool)
+    return mask
+
+def compile_screen(filters):
+    compiled = [compile_filter(f) for f in filters]
+    def mask(df):
+        out = np.ones(len(df), dtype=bool)
+        for fn in compiled: out &= fn(df)
+        return out
+    return mask
+
+def top_n(df, by, n, mask=None):
+    """The n rows with the largest `by` (heap-based, stable on ties), optionally inside `mask`.
+
+    NaN scores rank below every real value (NaN never compares, which would scramble the heap).
+    """
+    idx = np.arange(len(df)) if mask is None else np.flatnonzero(mask)
+    values = np.nan_to_num(df[by].to_numpy(dtype='float64', na_value=np.nan)[idx], nan=-np.inf)
+    best = heapq.nlargest(n, zip(values, -idx))
+    return df.iloc[[-i for _, i in best]]
+
+def run_screen(df, screen):
+    """Apply a screen dict {'filters', 'rank_by', 'top'} to a scan frame."""
+    mask = compile_screen(screen.get('filters', []))(df)
+    by = screen.get('rank_by')
+    if not by:
+        return df[mask].head(screen.get('top', len(df)))
+    return top_n(df, by, screen.get('top', 25), mask)
+
+def load_screens():
+    screens = dict(SAVED_SCREENS)
+    screens.update(load_json(SCREENS_FILE, {}))
+    return screens
+
+def save_screen(name, screen):
+    user = load_json(SCREENS_FILE, {})
+    user[name] = screen
+    save_json(SCREENS_FILE, user)
+
+def screen_page(name, screen, rows):
+    filters = " · ".join(screen.get('filters', [])) or "fara filtre"
+    head = f"""<!DOCTYPE html>
+<html lang="en" data-bs-theme="dark">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Screen: {name}</title>
+    <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css" rel="stylesheet">
+    <style>body {{ background-color: #121212; font-family: 'Segoe UI', sans-serif; color: #e0e0e0; }}</style>
+</head>
+<body class="p-3">
+    <h4 class="fw-bold">{name} <small class="text-muted">top {screen.get('top', '')} după {screen.get('rank_by', '-')}</small></h4>
+    <div class="small text-info mb-3">{filters}</div>
+    <a href="../{OUTPUT_HTML}" class="small">← Market Cortex</a>
+    <table class="table table-dark table-hover table-sm mt-2">
+        <thead>{TABLE_HEADER}</thead>
+        <tbody>"""
+    return [[head], rows, [f"""</tbody>
+    </table>
+    {AGE_SCRIPT}
+</body>
+</html>
+"""]]
+
+def publish_screens(df_all, screens=None):
+    """Write one small dashboard per saved screen; returns {name: (path, row count)}."""
+    screens = screens if screens is not None else load_screens()
+    if df_all is None or df_all.empty: return {}
+    df_all = df_all.drop_duplicates('Ticker').reset_index(drop=True)
+    os.makedirs(SCREENS_DIR, exist_ok=True)
+    written = {}
+    for name, screen in screens.items():
+        try:
+            hits = run_screen(df_all, screen)
+        except (ValueError, KeyError) as e:
+            print(f"Screen {name} ignorat: {e}")
+            continue
+        path = os.path.join(SCREENS_DIR, f"{name}.html")
+        write_html_stream(path, screen_page(name, screen, iter_rows(hits)))
+        written[name] = (path, len(hits))
+    return written
+
+def print_screen(df, screen):
+    hits = run_screen(df.drop_duplicates('Ticker').reset_index(drop=True), screen)
+    cols = [c for c in ['Ticker', 'Price', 'Decision', 'Trend', 'RSI', 'Consensus', 'To Target %', 'R:R',
+                        'Momentum_Score', 'Watchlist_Score', 'Industry'] if c in hits.columns]
+    print(hits[cols].to_string(index=False) if not hits.empty else "Niciun rezultat.")
+    return hits
+
+# --- HTTP API (read-only, din memorie) ---
+CORTEX_SNAPSHOT = os.path.join(CACHE_DIR, 'last_cortex.json')
+API_KEEPALIVE = 15  # secunde intre comentariile SSE
+
+def json_records(df):
+    """Rows as JSON-safe dicts (NaN -> None)."""
+    if df is None or df.empty: return []
+    return df.astype(object).where(df.notna(), None).to_dict('records')
+
+def make_response(body, content_type):
+    body = body.encode('utf-8') if isinstance(body, str) else body
+    return {'body': body, 'gzip': gzip.compress(body, mtime=0), 'type': content_type,
+            'etag': '"' + hashlib.sha1(body).hexdigest() + '"'}
+
+def etag_matches(header, etag):
+    """If-None-Match check: '*', comma-separated lists and W/ weak validators (weak comparison, RFC 9110)."""
+    if not header: return False
+    tags = [t.strip() for t in header.split(',')]
+    strip = lambda t: t[2:] if t.startswith('W/') else t
+    return '*' in tags or strip(etag) in {strip(t) for t in tags}
+
+def accepts_gzip(header):
+    """Accept-Encoding allows gzip: listed (or '*') with q > 0; an explicit gzip entry wins over '*'."""
+    q = {}
+    for part in (header or '').split(','):
+        coding, *params = [p.strip() for p in part.split(';')]
+        weight = 1.0
+        for param in params:
+            key, _, value = param.partition('=')
+            if key.strip().lower() == 'q':
+                try: weight = float(value)
+                except ValueError: weight = 0.0
+        if coding: q[coding.lower()] = weight
+    weight = q.get('gzip', q.get('x-gzip', q.get('*', 0.0)))
+    return weight > 0
+
+class ScanState:
+    """Latest scan, cortex and verdict held in memory, with every response pre-encoded.
+
+    refresh() reloads the files written by the last run (snapshot, cortex, verdict,
+    events) when their mtime changes and pushes only the changed rows to SSE clients.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.responses = {}
+        self.tickers = {}
+        self.mtimes = None
+        self.subscribers = []
+
+    def sources(self):
+        return [SCAN_SNAPSHOT, CORTEX_SNAPSHOT, VERDICT_SNAPSHOT, EVENTS_JSON]
+
+    def refresh(self):
+        mtimes = [os.path.getmtime(p) if os.path.exists(p) else None for p in self.sources()]
+        if mtimes == self.mtimes: return False
+        df = load_scan_snapshot()
+        if df is not None: df = df.drop(columns=['Spark'], errors='ignore')
+        rows = json_records(df.drop_duplicates('Ticker')) if df is not None else []
+        tickers = {r['Ticker']: r for r in rows}
+
+        responses = {
+            '/api/scan.json': make_response(json.dumps(rows), 'application/json'),
+            '/api/scan.csv': make_response(df.to_csv(index=False) if df is not None else '', 'text/csv'),
+            '/api/cortex': make_response(json.dumps(load_json(CORTEX_SNAPSHOT, {}), default=str), 'application/json'),
+            '/api/verdict': make_response(json.dumps(load_json(VERDICT_SNAPSHOT, {}), default=str), 'application/json'),
+            '/api/events': make_response(json.dumps(load_json(EVENTS_JSON, []), default=str), 'application/json'),
+        }
+        for t, r in tickers.items():
+            responses[f'/api/ticker/{t}'] = make_response(json.dumps(r), 'application/json')
+
+        with self.lock:
+            old = self.tickers
+            self.responses, self.tickers, self.mtimes = responses, tickers, mtimes
+            subscribers = list(self.subscribers)
+        if old:
+            changed = [r for t, r in tickers.items() if old.get(t) != r]
+            removed = [t for t in old if t not in tickers]
+            if changed or removed:
+                msg = json.dumps({'changed': changed, 'removed': removed})
+                for q in subscribers: q.put(msg)
+        print(f"API: {len(tickers)} simboluri incarcate")
+        return True
+
+    def get(self, path):
+        with self.lock:
+            return self.responses.get(path)
+
+    def subscribe(self):
+        q = queue.Queue()
+        with self.lock: self.subscribers.append(q)
+        return q
+
+    def unsubscribe(self, q):
+        with self.lock:
+            if q in self.subscribers: self.subscribers.remove(q)
+
+def make_api_handler(state):
+    class ApiHandler(http.server.BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, fmt, *args):
+            pass
+
+        def do_GET(self):
+            path = self.path.split('?', 1)[0]
+            if path == '/api/stream':
+                return self.stream()
+            res = state.get(path)
+            if res is None:
+                return self.reply(404, b'{"error": "not found"}', 'application/json')
+            if etag_matches(self.headers.get('If-None-Match'), res['etag']):
+                self.send_response(304)
+                self.send_header('ETag', res['etag'])
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            use_gzip = accepts_gzip(self.headers.get('Accept-Encoding'))
+            self.reply(200, res['gzip'] if use_gzip else res['body'], res['type'], res['etag'], use_gzip)
+
+        def reply(self, code, body, content_type, etag=None, gzipped=False):
+            self.send_response(code)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.send_header('Vary', 'Accept-Encoding')
+            if etag: self.send_header('ETag', etag)
+            if gzipped: self.send_header('Content-Encoding', 'gzip')
+            self.end_headers()
+            self.wfile.write(body)
+
+        def stream(self):
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Cache-Control', 'no-cache')
+            self.send_header('Connection', 'close')
+            self.end_headers()
+            q = state.subscribe()
+            try:
+                while True:
+                    try:
+                        msg = q.get(timeout=API_KEEPALIVE)
+                        self.wfile.write(f"event: rows\ndata: {msg}\n\n".encode('utf-8'))
+                    except queue.Empty:
+                        self.wfile.write(b": keepalive\n\n")
+                    self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+            finally:
+                state.unsubscribe(q)
+                self.close_connection = True
+
+    return ApiHandler
+
+def serve_api(host='127.0.0.1', port=8000, refresh_every=5.0):
+    """Serve the latest scan from memory; reload it when a new run writes its files."""
+    state = ScanState()
+    state.refresh()
+
+    def watch():
+        while True:
+            time.sleep(refresh_every)
+            try: state.refresh()
+            except Exception as e: print(f"Eroare refresh API: {e}")
+    threading.Thread(target=watch, daemon=True).start()
+
+    server = http.server.ThreadingHTTPServer((host, port), make_api_handler(state))
+    server.daemon_threads = True
+    print(f"API pornit pe http://{host}:{server.server_port}/api/scan.json")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+# --- SHARDING (procese locale sau runner-e separate) ---
+SHARD_DIR = 'shards'
+CSV_COLUMNS = ['Ticker', 'Company_Name', 'Price', 'Sug. Buy', 'Target', 'To Target %', 'Consensus', 'Analysts', 'Inst Own',
+               'Trend', 'RSI', 'RSI Status', 'ATR', 'Stop Loss', 'SMA 50', 'SMA 200', 
+               'Change %', 'Momentum_Score', 'Watchlist_Score', 'Industry', 'Theme', 'Decision', 'Volume', 'R:R',
+               'Earnings', 'Fetched', 'Changed', 'Data_Status', 'Target Prob %', 'Hold Days', 'P/C']
+PUBLISH_ONLY_COLUMNS = ['P/C']  # calculate in publish() (dupa merge), nu exista in fisierele shard
+STATE_ONLY_COLUMNS = ['Fetched']  # doar pentru programul de refresh; se schimba la fiecare descarcare, nu se publica
+
+def parse_shard(value):
+    """'i/N' -> (i, N), with 0 <= i < N."""
+    try:
+        i, n = (int(x) for x in value.split('/'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Shard invalid '{value}' (format: i/N)")
+    if n < 1 or not 0 <= i < n:
+        raise argparse.ArgumentTypeError(f"Shard invalid '{value}' (0 <= i < N)")
+    return i, n
+
+def shard_of(ticker, n_shards):
+    # crc32, nu hash(): trebuie sa dea acelasi rezultat pe orice masina / proces
+    return zlib.crc32(ticker.encode('utf-8')) % n_shards
+
+def shard_path(i, n_shards):
+    return os.path.join(SHARD_DIR, f"shard_{i:03d}_of_{n_shards:03d}.csv")
+
+def write_csv_atomic(df, path):
+    tmp = f"{path}.tmp"
+    df.to_csv(tmp, index=False)
+    os.replace(tmp, path)
+
+CSV_DECIMALS = 4  # formatare canonica: float32/float64 dau acelasi text
+
+def write_scan_csv(df_main):
+    if df_main is None: return
+    valid_cols = [c for c in CSV_COLUMNS if c in df_main.columns and c not in STATE_ONLY_COLUMNS]
+    out = df_main[valid_cols].copy()
+    floats = out.select_dtypes('floating').columns
+    out[floats] = out[floats].astype('float64').round(CSV_DECIMALS)
+    tmp = f"{OUTPUT_CSV}.tmp"
+    try:
+        out.to_csv(tmp, index=False, lineterminator='\n')
+        commit_artifact(tmp, OUTPUT_CSV)
+    finally:
+        if os.path.exists(tmp): os.remove(tmp)
+
+def all_tickers():
+    """Union of both lists, in file order."""
+    return list(dict.fromkeys(load_tickers(TICKERS_FILE) + load_tickers(CUSTOM_TICKERS_FILE)))
+
+def run_shard(i, n_shards, refresh_panel=True, budget=None, full=False):
+    """Scan only the tickers of shard i (both lists) and write its partial file.
+
+    The file depends only on the symbols in the shard, so a failed shard can be
+    rerun alone and simply overwrites its previous output. `budget` is this shard's
+    share of the fetch budget.
+    """
+    lists = {'main': load_tickers(TICKERS_FILE), 'custom': load_tickers(CUSTOM_TICKERS_FILE)}
+    mine = sorted({t for tickers in lists.values() for t in tickers if shard_of(t, n_shards) == i})
+    print(f">>> SHARD {i}/{n_shards}: {len(mine)} simboluri")
+    prepare_ohlc_panel(mine, refresh=refresh_panel)
+
+    df = scheduled_scan(mine, lists['custom'], budget, full)
+    columns = [c for c in CSV_COLUMNS if c not in PUBLISH_ONLY_COLUMNS] + ['Spark', 'List', 'Carried']
+    if df is None:
+        df = pd.DataFrame(columns=columns)
+    else:
+        # Un simbol prezent in ambele liste e descarcat o singura data, dar apare pe doua randuri
+        df = pd.concat([df[df['Ticker'].isin(tickers)].assign(List=name) for name, tickers in lists.items()],
+                       ignore_index=True)
+        df['Spark'] = [spark_to_text(spark) for spark in df['Spark']]
+
+    os.makedirs(SHARD_DIR, exist_ok=True)
+    path = shard_path(i, n_shards)
+    write_csv_atomic(df[columns], path)
+    write_run_report(path.replace('.csv', '.report.json'))
+    print(f"Shard scris: {path} ({len(df)} randuri)")
+    return path
+
+def merge_shards(n_shards):
+    """Combine the N shard files into (df_main, df_custom), in the order of the ticker files."""
+    paths = [shard_path(i, n_shards) for i in range(n_shards)]
+    missing = [p for p in paths if not os.path.exists(p)]
+    if missing:
+        raise FileNotFoundError(f"Lipsesc shard-urile: {', '.join(missing)}")
+
+    df = pd.concat([pd.read_csv(p, keep_default_na=False, na_values=['']) for p in paths], ignore_index=True)
+    df['Spark'] = [spark_from_text(v) for v in df['Spark']]
+
+    frames = {}
+    for name, filename in [('main', TICKERS_FILE), ('custom', CUSTOM_TICKERS_FILE)]:
+        order = {t: k for k, t in enumerate(load_tickers(filename))}
+        part = df[(df['List'] == name) & df['Ticker'].isin(order)].drop(columns='List')
+        part = part.sort_values('Ticker', key=lambda col: col.map(order)).reset_index(drop=True)
+        frames[name] = apply_result_schema(part) if not part.empty else None
+    RUN_REPORT['shards'] = {os.path.basename(p): load_json(p.replace('.csv', '.report.json'), {}).get('hosts', {})
+                            for p in paths}
+    print(f"Merge: {len(df)} randuri din {n_shards} shard-uri")
+    return frames['main'], frames['custom']
+
+def run_local_workers(n_workers, force=False, budget=None, full=False):
+    """Run N shard processes in parallel on this machine; returns the failed shard indexes.
+
+    The OHLC panel is refreshed once here; the workers only map it read-only.
+    """
+    refresh_ohlc_panel(all_tickers())
+    procs = []
+    for i in range(n_workers):
+        cmd = [sys.executable, os.path.abspath(__file__), '--shard', f"{i}/{n_workers}", '--panel-readonly']
+        if force: cmd.append('--force')
+        if full: cmd.append('--full-refresh')
+        if budget is not None: cmd += ['--fetch-budget', str(-(-budget // n_workers))]
+        procs.append((i, subprocess.Popen(cmd)))
+    return [i for i, proc in procs if proc.wait() != 0]
+
+def publish(df_main, df_custom, alert_sinks=()):
+    pc_table, pc_card = get_putcall_data(combine_lists(df_main, df_custom)['Ticker'].unique().tolist())
+    df_main, df_custom = add_putcall(df_main, pc_table), add_putcall(df_custom, pc_table)
+    write_scan_csv(df_main)
+
+    cortex_data = get_market_cortex_data()
+    cortex_data['Put/Call Ratio'] = pc_card
+    verdict_data = calculate_verdict(cortex_data)
+    verdict_history = calculate_verdict_history(cortex_data)
+    save_json(CORTEX_SNAPSHOT, cortex_data)
+    events = detect_changes(df_main, df_custom, verdict_data, alert_sinks)
+    df_all = combine_lists(df_main, df_custom)
+    screens = publish_screens(df_all)
+    rotation = compute_rotation(df_all)
+    
+    generate_html(df_main, df_custom, cortex_data, verdict_data, verdict_history, events, screens, rotation)
+    write_run_report()
+
 def main():
     print("--- Market Cortex v3.0 (Advanced) ---")
 
     # Argument Parsing
     parser = argparse.ArgumentParser(description='Market Scanner')
     parser.add_argument('--force', action='store_true', help='Force run even if market is closed')
+    parser.add_argument('--shard', type=parse_shard, metavar='i/N',
+                        help=f'Scan only shard i of N (0 <= i < N) and write a partial file to {SHARD_DIR}/')
+    parser.add_argument('--merge', type=int, metavar='N',
+                        help=f'Merge the N shard files into {OUTPUT_CSV} and {OUTPUT_HTML}')
+    parser.add_argument('--workers', type=int, metavar='N',
+                        help='Run N local shard processes, then merge')
+    parser.add_argument('--fetch-budget', type=int, default=FETCH_BUDGET, metavar='N',
+                        help='Fetch at most N symbols this run, highest refresh priority first; the rest reuse the last scan')
+    parser.add_argument('--full-refresh', action='store_true', help='Ignore the refresh schedule and fetch every symbol')
+    parser.add_argument('--panel-readonly', action='store_true',
+                        help=f'Use the OHLC panel in {PANEL_DIR} as is (set for --workers children)')
+    parser.add_argument('--alert-sink', type=parse_sink, action='append', default=[], metavar='KIND:TARGET',
+                        help=f"Send change events to a local sink ({', '.join(ALERT_SINKS)}); repeatable")
+    parser.add_argument('--screen', metavar='NAME',
+                        help=f"Run a saved screen on the last scan ({', '.join(SAVED_SCREENS)} or {SCREENS_FILE})")
+    parser.add_argument('--filter', action='append', default=[], metavar='EXPR',
+                        help="Ad-hoc screen filter, e.g. 'RSI between 30..50' or 'Decision in BUY,WATCH'; repeatable")
+    parser.add_argument('--rank-by', default='Watchlist_Score', help='Column used for top-N ranking')
+    parser.add_argument('--top', type=int, default=25, help='Number of screen results')
+    parser.add_argument('--save-screen', metavar='NAME', help=f'Save the --filter/--rank-by/--top screen to {SCREENS_FILE}')
+    parser.add_argument('--serve', action='store_true', help='Serve the last scan over a local read-only HTTP API')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
     args = parser.parse_args()
+    RUN_REPORT['started'] = datetime.datetime.now().isoformat(timespec='seconds')
+
+    if args.serve:
+        serve_api(args.host, args.port)
+        return
+
+    if args.screen or args.filter:
+        screens = load_screens()
+        if args.screen and args.screen not in screens:
+            print(f"Screen necunoscut: {args.screen}. Disponibile: {', '.join(screens)}")
+            sys.exit(1)
+        screen = screens[args.screen] if args.screen else {'filters': args.filter, 'rank_by': args.rank_by, 'top': args.top}
+        if args.save_screen:
+            save_screen(args.save_screen, screen)
+            print(f"Screen salvat: {args.save_screen} -> {SCREENS_FILE}")
+        df = load_scan_snapshot()
+        if df is None: df = pd.read_csv(OUTPUT_CSV)
+        print_screen(df, screen)
+        return
+
+    if args.merge:
+        init_yahoo_session()
+        df_main, df_custom = merge_shards(args.merge)
+        publish(df_main, df_custom, args.alert_sink)
+        print("\nMerge complet! Verifică index.html.")
+        return
 
     if not check_market_status(args.force):
         return
-    
-    
-    print(">>> LOADING MAIN WATCHLIST")
-    main_tickers = load_tickers(TICKERS_FILE)
-    df_main = process_ticker_list(main_tickers)
-    
-    if df_main is not None:
-        cols = ['Ticker', 'Company_Name', 'Price', 'Sug. Buy', 'Target', 'To Target %', 'Consensus', 'Analysts', 'Inst Own',
-                'Trend', 'RSI', 'RSI Status', 'ATR', 'Stop Loss', 'SMA 50', 'SMA 200', 
-                'Change %', 'Momentum_Score', 'Watchlist_Score', 'Industry', 'Theme', 'Decision', 'Volume', 'R:R']
-        valid_cols = [c for c in cols if c in df_main.columns]
-        df_main[valid_cols].to_csv(OUTPUT_CSV, index=False)
+    init_yahoo_session()
 
-    print("\n>>> LOADING CUSTOM WATCHLIST")
-    custom_tickers = load_tickers(CUSTOM_TICKERS_FILE)
-    df_custom = process_ticker_list(custom_tickers)
+    if args.shard:
+        run_shard(*args.shard, refresh_panel=not args.panel_readonly, budget=args.fetch_budget, full=args.full_refresh)
+        return
 
-    cortex_data = get_market_cortex_data()
-    verdict_data = calculate_verdict(cortex_data)
+    if args.workers:
+        failed = run_local_workers(args.workers, force=args.force, budget=args.fetch_budget, full=args.full_refresh)
+        if failed:
+            print(f"Shard-uri esuate: {failed}. Rulează din nou cu --shard i/{args.workers}, apoi --merge {args.workers}.")
+            sys.exit(1)
+        publish(*merge_shards(args.workers), args.alert_sink)
+        print("\nScanare completă! Verifică index.html.")
+        return
     
-    generate_html(df_main, df_custom, cortex_data, verdict_data)
+    lists = {'main': load_tickers(TICKERS_FILE), 'custom': load_tickers(CUSTOM_TICKERS_FILE)}
+    prepare_ohlc_panel(all_tickers(), refresh=not args.panel_readonly)
+
+    # Un simbol din ambele liste se descarca o singura data
+    print(">>> LOADING WATCHLISTS (main + custom)")
+    df_all = scheduled_scan(all_tickers(), lists['custom'], args.fetch_budget, args.full_refresh)
+    frames = split_lists(df_all, lists)
+
+    publish(frames['main'], frames['custom'], args.alert_sink)
     
     print("\nScanare completă! Verifică index.html.")
 